@@ -1,18 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status, BackgroundTasks, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from pydantic import BaseModel , EmailStr, Field, field_validator
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor
-import sqlite3, requests, bcrypt
+from contextlib import contextmanager
+import sqlite3, bcrypt
 import pandas as pd
-import uvicorn, torch, asyncio
-import os, httpx, csv
+import uvicorn, asyncio, threading
+import os, httpx, csv, json, subprocess, sys, time
 from dotenv import load_dotenv
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
-from scraper import scrape_by_keyword
+from scraper import scrape_keywords, iter_scrape_events, format_result, ScrapeIncomplete, ScrapeRun
+from dedup import load_tender_index
+from crawl_state import CrawlState, crawl_job_id, discard_crawl
+from jobs import JobRunner, submit_job, get_job, get_job_results, request_cancel, requeue_job
+from drivers import DriverPool
+from metrics import scraper_metrics
+from detail_cache import DetailCache
+from classifier import prompt_prefix, HotSwapClassifier, current_version, version_history
+from inference_pool import InferencePool
+from cascade import RelevanceCascade
+from classify_cache import ClassificationCache, cache_key
+from batcher import MicroBatcher
+from db import Database
+from decisions import upsert_decisions
+from ttl_cache import TTLCache
+from metabase import MetabaseClient, MetabaseError
+from schema import USERS_MIGRATIONS, REFRESH_TOKENS_MIGRATIONS, TENDERS_MIGRATIONS, CRAWL_STATE_MIGRATIONS, JOBS_MIGRATIONS, DETAIL_CACHE_MIGRATIONS, CLASSIFY_CACHE_MIGRATIONS, compact_refresh_tokens
 
 
 load_dotenv()
@@ -25,8 +42,41 @@ OUTPUT_DIR                = "/Users/Cheokerinos/metabase_data"
 DB_PATH                   = "users.db"
 METABASE_USERNAME         = os.getenv("METABASE_USERNAME")
 METABASE_PASSWORD         = os.getenv("METABASE_PASSWORD")
+METABASE_SESSION_TTL      = float(os.getenv("METABASE_SESSION_TTL_SECONDS", str(13 * 24 * 3600)))  #Metabase default is 14 days
+METABASE_LIST_TTL         = float(os.getenv("METABASE_LIST_TTL_SECONDS", "60"))
+METABASE_LIST_MAX_STALE   = float(os.getenv("METABASE_LIST_MAX_STALE_SECONDS", "600"))
 REFRESH_EXPIRE            = timedelta(days=7)
 REFRESH_TOKEN_DB          = "refresh_tokens.db"
+REFRESH_TOKEN_COMPACT_SECONDS = float(os.getenv("REFRESH_TOKEN_COMPACT_SECONDS", "3600"))
+SQLITE_POOL_SIZE          = int(os.getenv("SQLITE_POOL_SIZE", "8"))  #connections per database file
+AUTH_CACHE_TTL_SECONDS    = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE           = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+CRAWL_STATE_DB            = "crawl_state.db"
+CRAWL_STATE_MAX_AGE       = float(os.getenv("CRAWL_STATE_MAX_AGE_SECONDS", str(6 * 3600)))  #older checkpoints start over
+DETAIL_CACHE_DB           = "detail_cache.db"
+PENDING_AWARD_TTL         = int(os.getenv("PENDING_AWARD_CACHE_TTL_SECONDS", str(6 * 3600)))
+JOBS_DB                   = "jobs.db"
+MAX_CONCURRENT_JOBS       = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+SCRAPER_POOL_SIZE         = int(os.getenv("SCRAPER_POOL_SIZE", "4"))
+SCRAPER_WARM_API_POOL     = os.getenv("SCRAPER_WARM_API_POOL", "0") == "1"  #job workers keep their own pools warm
+SCRAPER_HTTP_FAST_PATH    = os.getenv("SCRAPER_HTTP_FAST_PATH", "1") == "1"
+SCRAPER_HEADLESS          = os.getenv("SCRAPER_HEADLESS", "1") == "1"
+SCRAPER_BLOCK_RESOURCES   = os.getenv("SCRAPER_BLOCK_RESOURCES", "1") == "1"
+SCRAPER_MAX_PAGES         = int(os.getenv("SCRAPER_MAX_PAGES_PER_SESSION", "300"))
+CLASSIFIER_MODEL_DIR      = os.getenv("CLASSIFIER_MODEL_DIR", "models")
+CLASSIFIER_BACKEND        = os.getenv("CLASSIFIER_BACKEND", "torch")  #torch or onnx
+CLASSIFIER_TORCH_ENGINE   = os.getenv("CLASSIFIER_TORCH_ENGINE", "auto")  #auto, fbgemm or qnnpack
+INFERENCE_WORKERS         = int(os.getenv("INFERENCE_WORKERS", "0"))  #0 runs the model in the API process
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER",
+                                             str(max(1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS)))))
+CLASSIFIER_POLL_SECONDS   = float(os.getenv("CLASSIFIER_POLL_SECONDS", "10"))
+CLASSIFY_BATCH_SIZE       = int(os.getenv("CLASSIFY_BATCH_SIZE", "32"))
+CLASSIFY_MAX_WAIT_MS      = float(os.getenv("CLASSIFY_MAX_WAIT_MS", "10"))
+CLASSIFY_CACHE_DB         = "classify_cache.db"
+CLASSIFY_CACHE_SIZE       = int(os.getenv("CLASSIFY_CACHE_SIZE", "10000"))
+CASCADE_ENABLED           = os.getenv("CASCADE_ENABLED", "1") == "1"
+CASCADE_TARGET_PRECISION  = float(os.getenv("CASCADE_TARGET_PRECISION", "0.97"))
+CASCADE_MIN_SUPPORT       = int(os.getenv("CASCADE_MIN_SUPPORT", "50"))
 
 
 if not METABASE_SECRET_KEY:
@@ -36,62 +86,31 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # --- Setting up Database ---
 DB_PATH = "users.db"
-def init_user_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        email TEXT,
-        hashed_password TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    conn.commit()
-    conn.close()
-    
-def init_refresh_token_db():
-    conn = sqlite3.connect(REFRESH_TOKEN_DB)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS refresh_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            token TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-    
-def init_nlp_db():
-    conn = sqlite3.connect(f"{OUTPUT_DIR}/mydata.db")
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS tenders
-                 (id INTEGER PRIMARY KEY,
-                  title TEXT NOT NULL,
-                  tender_number TEXT,
-                  agency TEXT NOT NULL,
-                  ref_number TEXT,
-                  awarded TEXT NOT NULL,
-                  awardee TEXT,
-                  respondents TEXT NOT NULL,
-                  num_of_respondents INTEGER NOT NULL,
-                  keywords TEXT NOT NULL,
-                  ai_prediction BOOLEAN,
-                  ai_confidence REAL,
-                  user_decision BOOLEAN,
-                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-    conn.commit()
-    conn.close()
-
-init_user_db()
-init_refresh_token_db()
-init_nlp_db()
+#one pool of WAL-mode connections per database file, shared by every request
+users_db          = Database(DB_PATH, size=SQLITE_POOL_SIZE)
+refresh_tokens_db = Database(REFRESH_TOKEN_DB, size=SQLITE_POOL_SIZE)
+tenders_db        = Database(f"{OUTPUT_DIR}/mydata.db", size=SQLITE_POOL_SIZE)
+crawl_state_db    = Database(CRAWL_STATE_DB, size=SQLITE_POOL_SIZE)
+jobs_db           = Database(JOBS_DB, size=SQLITE_POOL_SIZE)
+detail_cache_db   = Database(DETAIL_CACHE_DB, size=SQLITE_POOL_SIZE)
+classify_cache_db = Database(CLASSIFY_CACHE_DB, size=SQLITE_POOL_SIZE)
+
+#schemas are versioned in schema.py; each file is brought up to date before the app serves
+users_db.migrate(USERS_MIGRATIONS)
+refresh_tokens_db.migrate(REFRESH_TOKENS_MIGRATIONS)
+tenders_db.migrate(TENDERS_MIGRATIONS)
+crawl_state_db.migrate(CRAWL_STATE_MIGRATIONS)
+jobs_db.migrate(JOBS_MIGRATIONS)
+detail_cache_db.migrate(DETAIL_CACHE_MIGRATIONS)
+classify_cache_db.migrate(CLASSIFY_CACHE_MIGRATIONS)
 
 app = FastAPI()
 
+@app.on_event("shutdown")
+def close_databases():
+    for database in (users_db, refresh_tokens_db, tenders_db, crawl_state_db, detail_cache_db, classify_cache_db):
+        database.close()
+
 @app.get("/")
 def read_root():
     return {"status": "running", "message": "Power BI scraper back-end is up"}  
@@ -142,14 +161,10 @@ class RegisterRequest(BaseModel):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 def get_user(username: str) -> Optional[RegisterRequest]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
+    row = users_db.fetchone(
       "SELECT username, email, hashed_password FROM users WHERE username = ?",
       (username,)
     )
-    row = cur.fetchone()
-    conn.close()
     if not row:
         return None
     return {"username": row[0], "email": row[1], "password": row[2]}
@@ -180,6 +195,14 @@ def create_access_token(
     return jwt.encode(to_encode, BACKEND_SECRET_KEY, algorithm=ALGORITHM)
 
 
+#verified access tokens and the users they belong to, so most authenticated calls skip jwt.decode and SQLite
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+user_cache  = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+def invalidate_user(username: str):
+    """Call after a user is registered or changed, so the next request reads them from the database."""
+    user_cache.invalidate(username)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     print("Checking token:", token)
     creds_exc = HTTPException(
@@ -187,57 +210,75 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
       detail="Invalid authentication",
       headers={"WWW-Authenticate":"Bearer"}
     )
-    try:
-        payload = jwt.decode(token, BACKEND_SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if not username:
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, BACKEND_SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
             raise creds_exc
-    except JWTError:
-        raise creds_exc
-    user = get_user(username)
-    if not user:
+        #never outlive the token itself
+        token_cache.put(token, payload, ttl=payload.get("exp", 0) - time.time())
+    username = payload.get("sub")
+    if not username:
         raise creds_exc
-    return user
+    user = user_cache.get(username)
+    if user is None:
+        user = await users_db.run(get_user, username)
+        if not user:
+            raise creds_exc
+        user_cache.put(username, user)
+    return dict(user)
 
 def is_refresh_token_still_valid(username: str, token: str) -> bool:
-    conn = sqlite3.connect(REFRESH_TOKEN_DB)
-    cursor = conn.cursor()
-    cursor.execute("""
+    result = refresh_tokens_db.fetchone("""
         SELECT 1 FROM refresh_tokens
         WHERE username = ? AND token = ?
     """, (username, token))
-    result = cursor.fetchone()
-    conn.close()
     return result is not None
 
 
 def rotate_refresh_token(username: str, old: str, new: str):
-    conn = sqlite3.connect(REFRESH_TOKEN_DB)
-    cursor = conn.cursor()
-    # Delete old token
-    cursor.execute("""
-        DELETE FROM refresh_tokens WHERE username = ? AND token = ?
-    """, (username, old))
-    
-    # Insert new token
-    cursor.execute("""
-        INSERT INTO refresh_tokens (username, token, created_at)
-        VALUES (?, ?, ?)
-    """, (username, new, datetime.utcnow()))
-    
-    conn.commit()
-    conn.close()
+    #one transaction, so a failed insert doesn't leave the user with no token
+    with refresh_tokens_db.connection() as conn:
+        # Delete old token
+        conn.execute("""
+            DELETE FROM refresh_tokens WHERE username = ? AND token = ?
+        """, (username, old))
+        
+        # Insert new token
+        conn.execute("""
+            INSERT INTO refresh_tokens (username, token, created_at)
+            VALUES (?, ?, ?)
+        """, (username, new, datetime.utcnow()))
     
 def save_refresh_token(username: str, token: str):
-    conn = sqlite3.connect(REFRESH_TOKEN_DB)
-    cursor = conn.cursor()
-    cursor.execute("""
+    refresh_tokens_db.execute("""
         INSERT INTO refresh_tokens (username, token, created_at)
         VALUES (?, ?, ?)
     """, (username, token, datetime.utcnow()))
-    conn.commit()
-    conn.close()
-    
+
+refresh_token_compact_stop = threading.Event()
+
+def compact_refresh_tokens_periodically():
+    #tokens past REFRESH_EXPIRE can't be used any more; without this the table only grows
+    while True:
+        try:
+            removed = compact_refresh_tokens(refresh_tokens_db, datetime.utcnow() - REFRESH_EXPIRE)
+            if removed:
+                print(f"Removed {removed} expired refresh tokens")
+        except Exception as e:
+            print(f"Refresh token compaction failed: {e}")
+        if refresh_token_compact_stop.wait(REFRESH_TOKEN_COMPACT_SECONDS):
+            return
+
+@app.on_event("startup")
+def start_refresh_token_compaction():
+    threading.Thread(target=compact_refresh_tokens_periodically, daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_refresh_token_compaction():
+    refresh_token_compact_stop.set()
+
 # ---Email Validator---
 ABSTRACT_KEY = os.getenv("ABSTRACT_API_KEY")
 if not ABSTRACT_KEY:
@@ -266,22 +307,17 @@ async def validate_email_with_abstract(email: str):
 @app.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(req: RegisterRequest, bg:BackgroundTasks):
     await validate_email_with_abstract(req.email)
-    conn = sqlite3.connect(DB_PATH)
-    cur  = conn.cursor()
-    cur.execute(
+    if await users_db.afetchone(
       "SELECT 1 FROM users WHERE username = ?",
       (req.username,)
-    )
-    if cur.fetchone():
-        conn.close()
+    ):
         raise HTTPException(400, "Username already exists")
     hashed = bcrypt.hashpw(req.password.encode(), bcrypt.gensalt()).decode()
-    cur.execute(
+    await users_db.aexecute(
       "INSERT INTO users (username,email,hashed_password) VALUES (?,?,?)",
       (req.username, req.email, hashed)
     )
-    conn.commit()
-    conn.close()
+    invalidate_user(req.username)
     return {"message": "User registered successfully"}
 
 @app.post("/login", response_model=Token)
@@ -328,6 +364,11 @@ def refresh_token(req: RefreshRequest):
 
     return Token(access_token=new_access, refresh_token=new_refresh, token_type="bearer")
 
+@app.get("/auth/metrics")
+def auth_metrics(current_user: dict = Depends(get_current_user)):
+    """Hit ratios of the verified-token and user caches in front of get_current_user."""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
 
 '''
 @app.post("/uploadfile/")
@@ -359,30 +400,22 @@ class EmbedTableRequest(BaseModel):
 class EmbedResponse(BaseModel):
     iframe_url: str
 
-@app.get("/dashboards")
-async def list_dashboards(current_user: dict = Depends(get_current_user)):
-    session_resp = requests.post(
-        f"{METABASE_SITE_URL}/api/session",
-        json={"username": METABASE_USERNAME, "password": METABASE_PASSWORD},
-    )
-    if session_resp.status_code != 200:
-        raise HTTPException(status_code=500, detail="Failed to authenticate with Metabase")
+#one pooled client and session for every Metabase call, with short-lived caches of the embeddable lists
+metabase = MetabaseClient(
+    METABASE_SITE_URL, METABASE_USERNAME, METABASE_PASSWORD,
+    session_ttl=METABASE_SESSION_TTL, list_ttl=METABASE_LIST_TTL, max_stale=METABASE_LIST_MAX_STALE,
+)
 
-    session_token = session_resp.json()["id"]
+@app.on_event("shutdown")
+async def close_metabase():
+    await metabase.aclose()
 
-    resp = requests.get(
-        f"{METABASE_SITE_URL}/api/dashboard",
-        headers={"X-Metabase-Session": session_token}
-    )
-    if resp.status_code != 200:
-        raise HTTPException(status_code=resp.status_code, detail="Failed to get dashboards")
-    data = resp.json()
-    embedded_dashboards = [
-        {"id": d["id"], "name": d["name"]}
-        for d in data
-        if d.get("enable_embedding") is True
-    ]
-    return embedded_dashboards
+@app.get("/dashboards")
+async def list_dashboards(current_user: dict = Depends(get_current_user)):
+    try:
+        return await metabase.embeddable_dashboards()
+    except MetabaseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @app.post("/embed", response_model=EmbedResponse)
 async def get_embed_url(
@@ -405,30 +438,10 @@ async def get_embed_url(
 
 @app.get("/tables")
 async def list_tables(current_user: dict = Depends(get_current_user)):
-    session_resp = requests.post(
-        f"{METABASE_SITE_URL}/api/session",
-        json={"username": METABASE_USERNAME, "password": METABASE_PASSWORD},
-    )
-    if session_resp.status_code != 200:
-        raise HTTPException(502, "Failed to authenticate with Metabase")
-
-    session_token = session_resp.json()["id"]
-
-    resp = requests.get(
-        f"{METABASE_SITE_URL}/api/card",
-        headers={"X-Metabase-Session": session_token}
-    )
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, "Failed to get card list")
-
-    data = resp.json()
-
-    embedded_cards = [
-        {"id": c["id"], "name": c["name"]}
-        for c in data
-        if c.get("enable_embedding") is True
-    ]
-    return embedded_cards
+    try:
+        return await metabase.embeddable_cards()
+    except MetabaseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @app.post("/embed_table", response_model=EmbedResponse)
 async def get_table_embed_url(
@@ -447,16 +460,72 @@ async def get_table_embed_url(
     return {"iframe_url": iframe_url}
 
 
-#--- NLP Transformer Setup ---
-torch.backends.quantized.engine = "qnnpack"
-tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
-model = DistilBertForSequenceClassification.from_pretrained("distilbert-base-uncased", num_labels=2)
+#--- NLP Classification ---
+#the quantized artifact from build_model.py; falls back to downloading and quantizing if it hasn't been built
+if INFERENCE_WORKERS > 0:
+    #worker processes with a fixed thread budget each, instead of torch threads competing in this process
+    classifier = InferencePool(
+        CLASSIFIER_MODEL_DIR, CLASSIFIER_BACKEND, CLASSIFIER_TORCH_ENGINE,
+        workers=INFERENCE_WORKERS, threads=INFERENCE_THREADS_PER_WORKER,
+    )
+else:
+    classifier = HotSwapClassifier(CLASSIFIER_MODEL_DIR, CLASSIFIER_BACKEND, CLASSIFIER_TORCH_ENGINE)
+executor = ThreadPoolExecutor(max_workers=4)
 
-quantized_model = torch.quantization.quantize_dynamic(
-    model, {torch.nn.Linear}, dtype=torch.qint8
+def classify_with_version(items):
+    #each result comes with the cache version of the model that produced it
+    version, results = classifier.classify_versioned(items, CLASSIFY_BATCH_SIZE)
+    return [(result, version) for result in results]
+
+#(prefix, title) pairs from every concurrent /classify request share forward passes
+classify_batcher = MicroBatcher(
+    classify_with_version,
+    max_batch_size=CLASSIFY_BATCH_SIZE,
+    max_wait=CLASSIFY_MAX_WAIT_MS / 1000,
+    concurrency=max(1, INFERENCE_WORKERS),
 )
 
-executor = ThreadPoolExecutor(max_workers=4)
+classify_cache = ClassificationCache(classify_cache_db, classifier.cache_version, max_memory=CLASSIFY_CACHE_SIZE)
+
+#uncalibrated until startup has read the labelled tenders, which sends every title to the model
+relevance_cascade = RelevanceCascade()
+
+def calibrate_cascade():
+    global relevance_cascade
+    relevance_cascade = RelevanceCascade.calibrate(
+        tenders_db, target_precision=CASCADE_TARGET_PRECISION, min_support=CASCADE_MIN_SUPPORT
+    )
+    print(f"Relevance cascade: {relevance_cascade.stats()}")
+
+#swaps in whatever version train.py (or a rollback) makes current, between batches
+classifier_watch_stop = threading.Event()
+
+def watch_classifier_version():
+    while not classifier_watch_stop.wait(CLASSIFIER_POLL_SECONDS):
+        try:
+            previous = classifier.version
+            if classifier.reload():
+                classify_cache.model_version = classifier.cache_version
+                print(f"Classifier switched from {previous} to {classifier.version}")
+        except Exception as e:
+            print(f"Classifier reload failed, still serving {classifier.version}: {e}")
+
+training_process = None
+
+@app.on_event("startup")
+def start_classify_batcher():
+    classify_batcher.start()
+    threading.Thread(target=classifier.warm_up, daemon=True).start()
+    threading.Thread(target=watch_classifier_version, daemon=True).start()
+    if CASCADE_ENABLED:
+        threading.Thread(target=calibrate_cascade, daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_classify_batcher():
+    classifier_watch_stop.set()
+    classify_batcher.stop()
+    if isinstance(classifier, InferencePool):
+        classifier.close()
 
 class ClassificationRequest(BaseModel):
     tenders: list[str]
@@ -485,142 +554,99 @@ class BulkDecisions(BaseModel):
     decisions: List[DecisionItem]
 
     
-def classify_tender_sync(tender_title: str, keywords: list[str]):
-    """Classify tender relevance using DistilBERT (synchronous version)"""
-    prompt = f"Determine tender relevance for {', '.join(keywords)}: {tender_title}"
-    
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=128)
-    with torch.no_grad():
-        outputs = quantized_model(**inputs)
-    
-    probabilities = torch.softmax(outputs.logits, dim=1)
-    ai_prediction = bool(torch.argmax(probabilities, dim=1).item())
-    ai_confidence = float(torch.max(probabilities).item())
-    
-    return ai_prediction, ai_confidence
-
-async def classify_tender(tender_title: str, keywords: list[str]):
-    """Async wrapper for classification"""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        executor, 
-        classify_tender_sync, 
-        tender_title, 
-        keywords
-    )
-    
-def save_to_db(
-    tender_title: str,
-    tender_number: Optional[str],
-    agency: str,
-    ref_number: Optional[str],
-    awarded: str,
-    awardee: Optional[str],
-    respondents: str,
-    num_of_respondents: int,
-    keywords: list[str],
-    ai_prediction: bool,
-    ai_confidence: float,
-    user_decision: bool):
-    """Save tender data to SQLite database"""
-    try:
-        conn = sqlite3.connect(f"{OUTPUT_DIR}/mydata.db")
-        c = conn.cursor()
-        kw_str = '|'.join(keywords)
-        c.execute("""
-            INSERT INTO tenders
-            (title, tender_number, agency, ref_number,
-            awarded, awardee, respondents, num_of_respondents,
-            keywords, ai_prediction, ai_confidence, user_decision)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            tender_title,
-            tender_number,
-            agency,
-            ref_number,
-            awarded,
-            awardee,
-            respondents,
-            num_of_respondents,
-            kw_str,
-            ai_prediction,
-            ai_confidence,
-            user_decision
-        ))
-        conn.commit()
-        return c.lastrowid
-    except Exception as e:
-        print(f"Database error: {str(e)}")
-        raise
-    finally:
-        conn.close()
-
 #--- NLP Endpoints ---
 @app.post("/classify")
-async def classify_tenders(request: ClassificationRequest):
+async def classify_tenders(request: ClassificationRequest, response: Response):
     """Classify multiple tenders"""
     try:
-        results = []
-        classification_tasks = []
-        
-        # Create classification tasks
-        for tender in request.tenders:
-            task = classify_tender(tender, request.keywords)
-            classification_tasks.append(task)
+        loop = asyncio.get_running_loop()
+        #the model can be swapped mid-request; this request's cache reads stay on one version
+        model_version = classifier.cache_version
+        #clear-cut titles are settled by the TF-IDF stage, the rest go through cache and model
+        classification_results = await loop.run_in_executor(
+            executor, relevance_cascade.decide, request.tenders, request.keywords
+        )
+        stages = ["tfidf" if r is not None else "model" for r in classification_results]
+        undecided = [i for i, r in enumerate(classification_results) if r is None]
+        cached = await loop.run_in_executor(
+            executor, classify_cache.get_many, [request.tenders[i] for i in undecided], request.keywords, model_version
+        )
+        for i, result in zip(undecided, cached):
+            classification_results[i] = result
         
-        # Run classifications concurrently
-        classification_results = await asyncio.gather(*classification_tasks)
+        #only titles the cache doesn't know go to the model, each distinct one once
+        misses = {}
+        for i in undecided:
+            if classification_results[i] is None:
+                misses.setdefault(cache_key(request.tenders[i], request.keywords, model_version), []).append(i)
+        if misses:
+            titles = [request.tenders[positions[0]] for positions in misses.values()]
+            prefix = prompt_prefix(request.keywords)
+            futures = classify_batcher.submit([(prefix, title) for title in titles])
+            fresh = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+            by_version = {}
+            for title, positions, (result, version) in zip(titles, misses.values(), fresh):
+                for i in positions:
+                    classification_results[i] = result
+                by_version.setdefault(version, ([], []))
+                by_version[version][0].append(title)
+                by_version[version][1].append(result)
+            #cached under the version that produced them, which a swap mid-request can make differ from model_version
+            for version, (version_titles, results) in by_version.items():
+                await loop.run_in_executor(
+                    executor, classify_cache.put_many, version_titles, request.keywords, results, version
+                )
         
-        # Format results
-        for tender, (ai_prediction, ai_confidence) in zip(request.tenders, classification_results):
-            results.append({
+        skipped = stages.count("tfidf") / len(stages) if stages else 0.0
+        response.headers["X-Model-Skipped-Fraction"] = f"{skipped:.3f}"
+        return [
+            {
                 "title": tender,
                 "ai_prediction": ai_prediction,
-                "ai_confidence": ai_confidence
-            })
-        
-        return results
+                "ai_confidence": ai_confidence,
+                "stage": stage
+            }
+            for tender, (ai_prediction, ai_confidence), stage in zip(request.tenders, classification_results, stages)
+        ]
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-def get_all_titles():
-    conn = sqlite3.connect(f"{OUTPUT_DIR}/mydata.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT Title FROM tenders")
-    titles = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return titles
-    
-def clear_tenders_table():
-    conn = sqlite3.connect(f"{OUTPUT_DIR}/mydata.db")
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM tenders")
-    conn.commit()
-    conn.close()
+
+@app.get("/classify/metrics")
+def classify_metrics(current_user: dict = Depends(get_current_user)):
+    """Batcher queue depth, batch sizes and queue wait, result cache hit ratio and cascade skip rate."""
+    return {**classify_batcher.stats(), "cache": classify_cache.stats(), "cascade": relevance_cascade.stats()}
+
+@app.get("/classifier")
+def classifier_status(current_user: dict = Depends(get_current_user)):
+    """Version being served, the published versions and whether a fine-tuning run is in progress."""
+    return {
+        "serving": classifier.version,
+        "current": current_version(CLASSIFIER_MODEL_DIR),
+        "history": version_history(CLASSIFIER_MODEL_DIR),
+        "training": training_process is not None and training_process.poll() is None,
+    }
+
+@app.post("/classifier/train", status_code=status.HTTP_202_ACCEPTED)
+def start_training(current_user: dict = Depends(get_current_user)):
+    """Fine-tune on saved user decisions in a separate low-priority process; the new version is picked up when published."""
+    global training_process
+    if training_process is not None and training_process.poll() is None:
+        raise HTTPException(status_code=409, detail="Training already running")
+    training_process = subprocess.Popen([
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "train.py"),
+        "--model-dir", CLASSIFIER_MODEL_DIR, "train", "--db", f"{OUTPUT_DIR}/mydata.db",
+        *(["--onnx"] if CLASSIFIER_BACKEND == "onnx" else []),
+    ])
+    return {"detail": "Training started"}
     
 @app.post("/save-decisions")
 async def save_decision(payload: BulkDecisions, current_user=Depends(get_current_user)):
     try:
-        clear_tenders_table()  # Clear existing data before saving new decisions
-        for d in payload.decisions:
-            save_to_db(
-                tender_title=d.title,
-                tender_number=d.tender_number,
-                agency=d.agency,
-                ref_number=d.ref_number,
-                awarded=d.awarded,
-                awardee=d.awardee,
-                respondents=d.respondents,
-                num_of_respondents=d.num_of_respondents,
-                keywords=d.keywords,
-                ai_prediction=d.ai_prediction,
-                ai_confidence=d.ai_confidence,
-                user_decision=d.user_decision
-            )
-            
+        #one transaction for the whole payload and its tender_index keys, matched by tender and keyword set
+        counts = await tenders_db.run(upsert_decisions, tenders_db, [d.model_dump() for d in payload.decisions])
         
-        return {"status": "success", "message": "Decision saved to database"}
+        return {"status": "success", "message": "Decision saved to database", **counts}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -629,34 +655,71 @@ async def save_decision(payload: BulkDecisions, current_user=Depends(get_current
 class KeywordRequest(BaseModel):
     keywords: List[str]
 
+#Chrome sessions shared by every /generate call, reused across keywords and requests
+driver_pool = DriverPool(
+    SCRAPER_POOL_SIZE,
+    max_pages=SCRAPER_MAX_PAGES,
+    headless=SCRAPER_HEADLESS,
+    block_resources=SCRAPER_BLOCK_RESOURCES,
+)
+
+detail_cache = DetailCache(detail_cache_db, pending_ttl=PENDING_AWARD_TTL)
+
+@app.on_event("startup")
+def warm_driver_pool():
+    #jobs are the main scrape path; only warm this pool for deployments whose clients use /generate
+    if SCRAPER_WARM_API_POOL:
+        threading.Thread(target=driver_pool.warm, daemon=True).start()
+
+@app.on_event("shutdown")
+def close_driver_pool():
+    driver_pool.close()
+
 OUTPUT_DIR = "/Users/Cheokerinos/metabase_data"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+#crawl ids with a scrape running in this process; two runs of one keyword set would share one checkpoint
+running_crawls = set()
+running_crawls_lock = threading.Lock()
+
+class CrawlBusy(Exception):
+    pass
+
+@contextmanager
+def claim_crawl(job_id):
+    with running_crawls_lock:
+        if job_id in running_crawls:
+            raise CrawlBusy("A scrape of these keywords is already running")
+        running_crawls.add(job_id)
+    try:
+        yield CrawlState(crawl_state_db, job_id, max_age=CRAWL_STATE_MAX_AGE)
+    finally:
+        with running_crawls_lock:
+            running_crawls.discard(job_id)
     
 @app.post("/generate")
 def scrape_tenders(request: KeywordRequest,
                    current_user: dict = Depends(get_current_user)):
-    past_results = get_all_titles()
-    all_results = []
-    for keyword in request.keywords:
-        print(f"Scraping for keyword: {keyword}")
-        results = scrape_by_keyword(keyword, past_results=past_results)
-        if results:
-            for result in results:
-                if result not in all_results:
-                    all_results.append(result)
+    index = load_tender_index(tenders_db)
+    failed = []
+    #a retry of the same keyword set by the same user picks up where the last attempt stopped
+    try:
+        with claim_crawl(crawl_job_id(current_user["username"], request.keywords)) as state:
+            try:
+                run = ScrapeRun(index=index, fast_path=SCRAPER_HTTP_FAST_PATH, state=state, cache=detail_cache)
+                all_results = scrape_keywords(request.keywords, run, pool=driver_pool, pool_size=SCRAPER_POOL_SIZE)
+            except ScrapeIncomplete as e:
+                #keep the checkpoint so a retry only redoes the failed tabs
+                all_results, failed = e.results, e.failed
+            else:
+                state.clear()
+    except CrawlBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     for result in all_results:
-        respondents = result.get("Respondents")
-        if isinstance(respondents, list):
-            formatted = [f"{r} - {a}" for r, a in respondents]
-            result["Respondents"] = " | ".join(formatted)
-            result["Num of Respondents"] = len(respondents)
-        else:
-            result["Respondents"] = "N/A"
-            result["Num of Respondents"] = 0
+        format_result(result)
     
     
-    return { "results": all_results}
+    return { "results": all_results, "failed": [{"keyword": keyword, "tab": tag} for keyword, tag in failed]}
 
 
 '''    df = pd.DataFrame(all_results)
@@ -671,6 +734,106 @@ def scrape_tenders(request: KeywordRequest,
     df.to_csv(filename, index=False)
     csv_to_sqlite(csv_path,sqlite_path)'''
     
+@app.post("/generate/stream")
+def stream_tenders(request: KeywordRequest,
+                   current_user: dict = Depends(get_current_user)):
+    """Same scrape as /generate, streamed as NDJSON tender and progress events ending in "done" or "error"."""
+    index = load_tender_index(tenders_db)
+    job_id = crawl_job_id(current_user["username"], request.keywords)
+
+    def events():
+        try:
+            with claim_crawl(job_id) as state:
+                run = ScrapeRun(index=index, fast_path=SCRAPER_HTTP_FAST_PATH, state=state, cache=detail_cache)
+                for event in iter_scrape_events(request.keywords, run, pool=driver_pool, pool_size=SCRAPER_POOL_SIZE):
+                    if event["event"] == "tender":
+                        format_result(event["result"])
+                    elif event["event"] == "done":
+                        state.clear()
+                    yield json.dumps(event) + "\n"
+        except CrawlBusy as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+    
+@app.get("/scraper/metrics")
+def scraper_metrics_snapshot(current_user: dict = Depends(get_current_user)):
+    """Step latency histograms and counters of every scrape run by this API process."""
+    return {"summary": scraper_metrics.summary(), **scraper_metrics.snapshot()}
+
+#---Scrape Jobs---
+job_runner = JobRunner(
+    jobs_db,
+    crawl_state_db,
+    settings={
+        "tenders_db": f"{OUTPUT_DIR}/mydata.db",
+        "crawl_state_db": CRAWL_STATE_DB,
+        "crawl_state_max_age": CRAWL_STATE_MAX_AGE,
+        "pool_size": SCRAPER_POOL_SIZE,
+        "fast_path": SCRAPER_HTTP_FAST_PATH,
+        "headless": SCRAPER_HEADLESS,
+        "block_resources": SCRAPER_BLOCK_RESOURCES,
+        "max_pages": SCRAPER_MAX_PAGES,
+        "detail_cache_db": DETAIL_CACHE_DB,
+        "pending_award_ttl": PENDING_AWARD_TTL,
+    },
+    max_concurrent=MAX_CONCURRENT_JOBS,
+)
+
+@app.on_event("startup")
+def start_job_runner():
+    job_runner.start()
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    job_runner.stop()
+    #closed here rather than with the other databases, since the runner uses it until it stops
+    jobs_db.close()
+
+def get_own_job(job_id: str, current_user: dict):
+    job = get_job(jobs_db, job_id)
+    if not job or job["username"] != current_user["username"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_job(request: KeywordRequest,
+               current_user: dict = Depends(get_current_user)):
+    job_id = submit_job(jobs_db, current_user["username"], request.keywords)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, offset: int = 0,
+               current_user: dict = Depends(get_current_user)):
+    """Status and progress of a job, plus the results scraped so far from `offset` on."""
+    job = get_own_job(job_id, current_user)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "keywords": job["keywords"],
+        "progress": job["progress"],
+        "result_count": job["result_count"],
+        "error": job["error"],
+        "timings": job["timings"],
+        "results": get_job_results(jobs_db, job_id, offset),
+    }
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    get_own_job(job_id, current_user)
+    if request_cancel(jobs_db, job_id):
+        #a requeued job can carry checkpoints of its failed run, and cancelled jobs aren't retried
+        discard_crawl(crawl_state_db, job_id)
+    return {"job_id": job_id, "status": get_job(jobs_db, job_id)["status"]}
+
+@app.post("/jobs/{job_id}/retry", status_code=status.HTTP_202_ACCEPTED)
+def retry_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Queue a failed job again; it resumes after the pages it had already finished."""
+    if get_own_job(job_id, current_user)["status"] != "failed":
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried")
+    requeue_job(jobs_db, job_id)
+    return {"job_id": job_id, "status": "queued"}
+    
 def csv_to_sqlite(csv_path, sqlite_path, table_name="tenders"):
     df = pd.read_csv(csv_path)
     conn = sqlite3.connect(sqlite_path)
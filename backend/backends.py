@@ -0,0 +1,82 @@
+import os, platform
+import numpy as np
+import torch
+
+
+ONNX_FILE = "model.int8.onnx"
+
+
+def default_engine():
+    """fbgemm on x86 servers, qnnpack on ARM (and anywhere fbgemm isn't built in)."""
+    supported = torch.backends.quantized.supported_engines
+    if platform.machine().lower() in ("x86_64", "amd64", "i386", "i686") and "fbgemm" in supported:
+        return "fbgemm"
+    return "qnnpack"
+
+def resolve_engine(engine):
+    engine = default_engine() if engine in (None, "", "auto") else engine
+    if engine not in torch.backends.quantized.supported_engines:
+        raise RuntimeError(f"Quantized engine {engine!r} is not available in this torch build")
+    return engine
+
+
+class TorchBackend:
+    """Dynamically quantized PyTorch model. Packed weights are rebuilt for `engine` when it is loaded."""
+    name = "torch"
+
+    def __init__(self, model, engine="auto"):
+        self.engine = resolve_engine(engine)
+        torch.backends.quantized.engine = self.engine
+        self.model = model.eval()
+
+    def logits(self, input_ids, attention_mask):
+        with torch.no_grad():
+            return self.model(
+                input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask)
+            ).logits.numpy()
+
+
+class OnnxBackend:
+    """int8 ONNX Runtime session on the CPU execution provider."""
+    name = "onnx"
+
+    def __init__(self, path, threads=0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("CLASSIFIER_BACKEND=onnx needs onnxruntime (pip install onnxruntime)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads  #0 lets onnxruntime pick
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def logits(self, input_ids, attention_mask):
+        return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+
+def export_onnx(model, path):
+    """Export an fp32 DistilBERT classifier to ONNX and quantize its weights to int8 in `path`."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    fp32_path = path + ".fp32.tmp"
+    #a padded dummy batch, so the attention mask is traced as a real input rather than dropped
+    input_ids = torch.ones((2, 8), dtype=torch.long)
+    attention_mask = torch.ones((2, 8), dtype=torch.long)
+    attention_mask[1, 5:] = 0
+    model.config._attn_implementation = "eager"  #sdpa's mask shortcuts don't survive tracing
+    torch.onnx.export(
+        model.eval(), (input_ids, attention_mask), fp32_path,
+        input_names=["input_ids", "attention_mask"], output_names=["logits"],
+        dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                      "attention_mask": {0: "batch", 1: "sequence"},
+                      "logits": {0: "batch"}},
+        opset_version=17, dynamo=False,
+    )
+    try:
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    finally:
+        os.remove(fp32_path)
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
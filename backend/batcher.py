@@ -0,0 +1,107 @@
+from concurrent.futures import Future
+import queue, threading, time
+from metrics import Histogram
+
+
+#bucket upper bounds for queue wait (seconds) and batch size (items)
+WAIT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """Runs items from concurrent callers through `infer` in batches of up to `max_batch_size`, waiting at most `max_wait`.
+
+    `infer(items)` returns one result per item, in order; `concurrency` worker threads form and run batches.
+    """
+    def __init__(self, infer, max_batch_size=32, max_wait=0.01, concurrency=1):
+        self.infer = infer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.concurrency = concurrency
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._waits = Histogram(WAIT_BUCKETS)
+        self._sizes = Histogram(SIZE_BUCKETS)
+        self._infer_times = Histogram(WAIT_BUCKETS)
+        self._batches = 0
+        self._items = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(self.concurrency)]
+                for t in self._threads:
+                    t.start()
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def submit(self, items):
+        """Queue items for inference. Returns one Future per item."""
+        self.start()
+        futures = []
+        now = time.perf_counter()
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, now))
+            futures.append(future)
+        return futures
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                #whatever is already queued joins the batch even once the deadline has passed
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = self.infer([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._sizes.observe(len(batch))
+                self._infer_times.observe(finished - start)
+                for _, _, queued_at in batch:
+                    self._waits.observe(start - queued_at)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        """Queue depth, batch size distribution and time spent waiting in the queue."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait": self.max_wait,
+                "concurrency": self.concurrency,
+                "batches": self._batches,
+                "items": self._items,
+                "batch_size": self._sizes.to_dict(),
+                "queue_wait": self._waits.to_dict(),
+                "inference": self._infer_times.to_dict(),
+            }
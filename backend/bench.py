@@ -0,0 +1,1099 @@
+"""Benchmarks for the scraper and backend. Run from the backend folder, e.g.
+
+    python bench.py detail --keyword "Facilities Management" --limit 10
+    python bench.py suite --out before.json     #then, on a later commit:
+    python bench.py suite --out after.json --compare before.json
+"""
+import argparse, glob, os, statistics, time
+
+
+def summarize(name, samples):
+    if not samples:
+        print(f"{name}: no samples")
+        return
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name}: n={len(samples)} mean={statistics.mean(samples)*1000:.1f}ms "
+          f"p50={statistics.median(samples)*1000:.1f}ms p95={p95*1000:.1f}ms")
+
+
+#--- Tender detail pages: HTTP fast path vs Selenium ---
+def bench_detail(args):
+    from tender_detail import parse_tender_detail, make_http_session, fetch_tender_detail
+
+    if args.html_dir:
+        #offline: parser cost only, against saved detail pages
+        parse_times = []
+        for path in sorted(glob.glob(f"{args.html_dir}/*.html")):
+            with open(path, "rb") as f:
+                page = f.read()
+            start = time.perf_counter()
+            parse_tender_detail(page)
+            parse_times.append(time.perf_counter() - start)
+        summarize("lxml parse", parse_times)
+        return
+
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from drivers import init_driver
+    from scraper import search_keyword, scrape_tender_selenium
+    driver = init_driver()
+    try:
+        wait = WebDriverWait(driver, 5)
+        search_keyword(driver, wait, args.keyword)
+        links = []
+        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE")))
+        for e in driver.find_elements(By.CLASS_NAME, "commandLink_TITLE-BLUE")[:args.limit]:
+            links.append((e.text.strip(), e.get_attribute("href")))
+        session = make_http_session(driver)
+
+        http_times, fallbacks = [], 0
+        for title, link in links:
+            start = time.perf_counter()
+            if fetch_tender_detail(session, title, link) is None:
+                fallbacks += 1
+            http_times.append(time.perf_counter() - start)
+
+        selenium_times = []
+        for title, link in links:
+            start = time.perf_counter()
+            scrape_tender_selenium(driver, wait, title, link)
+            selenium_times.append(time.perf_counter() - start)
+    finally:
+        driver.quit()
+    summarize("http fast path", http_times)
+    print(f"http fast path needed a Selenium fallback for {fallbacks}/{len(links)} tenders")
+    summarize("selenium", selenium_times)
+
+
+#--- Chrome startup time and bytes transferred per tender ---
+PAGE_BYTES_JS = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce((total, e) => total + (e.transferSize || 0), 0);
+"""
+
+def bench_driver(args):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from drivers import init_driver, driver_path, DriverPool
+    from scraper import search_keyword
+
+    start = time.perf_counter()
+    driver_path()
+    print(f"chromedriver resolution (first call, cached afterwards): {(time.perf_counter() - start)*1000:.0f}ms")
+
+    for label, kwargs in (("before (full profile)", {"headless": False, "block_resources": False}),
+                          ("after (headless, resources blocked)", {"headless": True, "block_resources": True})):
+        if args.skip_headed and not kwargs["headless"]:
+            continue
+        startups = []
+        for _ in range(args.startups):
+            start = time.perf_counter()
+            driver = init_driver(**kwargs)
+            startups.append(time.perf_counter() - start)
+            driver.quit()
+        summarize(f"{label} startup", startups)
+
+        driver = init_driver(**kwargs)
+        try:
+            wait = WebDriverWait(driver, 10)
+            search_keyword(driver, wait, args.keyword)
+            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE")))
+            links = [e.get_attribute("href") for e in driver.find_elements(By.CLASS_NAME, "commandLink_TITLE-BLUE")[:args.limit]]
+            sizes = []
+            for link in links:
+                driver.get(link)
+                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "formOutputText_VALUE-DIV")))
+                sizes.append(driver.execute_script(PAGE_BYTES_JS))
+        finally:
+            driver.quit()
+        if sizes:
+            print(f"{label} bytes per tender: mean={statistics.mean(sizes)/1024:.1f}KiB over {len(sizes)} pages")
+
+    pool = DriverPool(1)
+    pool.warm()
+    start = time.perf_counter()
+    driver = pool.acquire()
+    print(f"warm pool acquire: {(time.perf_counter() - start)*1000:.1f}ms")
+    pool.release(driver)
+    pool.close()
+
+
+#--- Relevance classifier: per-title vs batched forward passes ---
+SAMPLE_TITLES = [
+    "Provision of Facilities Management Services for Government Buildings",
+    "Supply and Delivery of Laptops",
+    "Term Contract for Cleaning Services at Schools",
+    "Call for Proposal for AI-Enabled Video Analytics Platform",
+    "Maintenance of Air-Conditioning and Mechanical Ventilation Systems at Various Sites for a Period of 3 Years",
+    "Catering Services",
+]
+
+def load_titles(db_path, limit):
+    import sqlite3
+    try:
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT title FROM tenders LIMIT ?", (limit,)).fetchall()
+        conn.close()
+    except sqlite3.Error:
+        rows = []
+    titles = [r[0] for r in rows if r[0]]
+    if not titles:
+        titles = SAMPLE_TITLES
+    return [titles[i % len(titles)] for i in range(limit)]
+
+def bench_classify(args):
+    from classifier import load_classifier
+
+    classifier = load_classifier(args.model_dir)
+    titles = load_titles(args.db, args.titles)
+    keywords = args.keywords
+    classifier.classify_batch(titles[:8], keywords)  #warm-up
+
+    start = time.perf_counter()
+    single = [classifier.classify_tender(t, keywords) for t in titles]
+    elapsed = time.perf_counter() - start
+    print(f"per-title: {len(titles) / elapsed:.1f} titles/s ({elapsed:.2f}s for {len(titles)})")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        batched = classifier.classify_batch(titles, keywords, batch_size)
+        elapsed = time.perf_counter() - start
+        same = sum(a[0] == b[0] for a, b in zip(single, batched))
+        print(f"batch={batch_size:<4} {len(titles) / elapsed:.1f} titles/s ({elapsed:.2f}s), "
+              f"{same}/{len(titles)} predictions match per-title")
+
+
+#--- Shared micro-batcher under concurrent small requests ---
+def bench_batcher(args):
+    import threading
+    from batcher import MicroBatcher
+    from classifier import prompt_prefix, load_classifier
+
+    titles = load_titles(args.db, args.requests * args.request_size)
+    requests_ = [
+        [(prompt_prefix(args.keywords), t) for t in titles[i:i + args.request_size]]
+        for i in range(0, len(titles), args.request_size)
+    ]
+    classifier = load_classifier(args.model_dir)
+    classifier.classify_items(requests_[0])  #warm-up
+
+    def run(label, handle):
+        latencies = []
+        lock = threading.Lock()
+        def client(chunk):
+            for prompts in chunk:
+                start = time.perf_counter()
+                handle(prompts)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+        chunks = [requests_[i::args.clients] for i in range(args.clients)]
+        threads = [threading.Thread(target=client, args=(c,)) for c in chunks]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{label}: {len(titles) / elapsed:.1f} titles/s, request p50={statistics.median(latencies)*1000:.1f}ms "
+              f"p99={p99*1000:.1f}ms")
+
+    #before: every request runs its own forward pass
+    infer_lock = threading.Lock()
+    def own_pass(items):
+        with infer_lock:
+            classifier.classify_items(items, args.batch_size)
+    run("per-request batches", own_pass)
+
+    batcher = MicroBatcher(lambda items: classifier.classify_items(items, args.batch_size),
+                           max_batch_size=args.batch_size, max_wait=args.max_wait_ms / 1000)
+    run("shared micro-batcher", lambda items: [f.result() for f in batcher.submit(items)])
+    stats = batcher.stats()
+    batcher.stop()
+    print(f"batches={stats['batches']} mean size={stats['batch_size']['mean']} "
+          f"queue wait p50<={stats['queue_wait']['p50']}s p99<={stats['queue_wait']['p99']}s")
+
+
+#--- Classifier cold start: pretrained + quantize vs saved artifact ---
+COLD_START_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from classifier import load_artifact, load_pretrained, current_version
+imported = time.perf_counter()
+if sys.argv[1] == "pretrained":
+    classifier = load_pretrained()
+else:
+    classifier = load_artifact(sys.argv[2] + "/" + current_version(sys.argv[2]))
+loaded = time.perf_counter()
+classifier.warm_up()
+ready = time.perf_counter()
+print(imported - start, loaded - imported, ready - loaded)
+"""
+
+def bench_coldstart(args):
+    import subprocess, sys
+
+    modes = [("artifact", {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1"})]  #proves boot needs no network
+    if not args.skip_pretrained:
+        modes.insert(0, ("pretrained", {}))
+    for mode, env in modes:
+        samples = []
+        for _ in range(args.runs):
+            #a fresh interpreter each time, like a restart
+            out = subprocess.run(
+                [sys.executable, "-c", COLD_START_SCRIPT, mode, args.model_dir],
+                capture_output=True, text=True, env={**os.environ, **env}, check=True,
+            ).stdout.strip().splitlines()[-1]
+            samples.append([float(x) for x in out.split()])
+        for i, step in enumerate(("import", "load", "first forward")):
+            summarize(f"{mode} {step}", [s[i] for s in samples])
+        summarize(f"{mode} total", [sum(s) for s in samples])
+
+
+#--- Tokenization: slow tokenizer on full prompts vs fast tokenizer with a reused prefix ---
+def bench_tokenize(args):
+    from transformers import DistilBertTokenizer
+    from classifier import MAX_LENGTH, build_prompt, current_version, load_classifier, prompt_prefix
+
+    classifier = load_classifier(args.model_dir)
+    version = current_version(args.model_dir)
+    slow = DistilBertTokenizer.from_pretrained(f"{args.model_dir}/{version}" if version else "distilbert-base-uncased")
+    titles = load_titles(args.db, args.titles)
+    prompts = [build_prompt(t, args.keywords) for t in titles]
+    items = [(prompt_prefix(args.keywords), t) for t in titles]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {elapsed / len(titles) * 1e6:.1f}us per title")
+        return out
+
+    timed("slow tokenizer, full prompts", lambda: slow(prompts, padding=True, truncation=True, max_length=MAX_LENGTH))
+    timed("fast tokenizer, full prompts", lambda: classifier.tokenizer(prompts, padding=True, truncation=True, max_length=MAX_LENGTH))
+    classifier._prefixes.clear()
+    timed("fast tokenizer, reused prefix", lambda: list(classifier.encode(items, args.batch_size)))
+
+    expected = classifier.tokenizer(prompts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+    same = 0
+    for positions, inputs in classifier.encode(items, args.batch_size):
+        for row, i in enumerate(positions):
+            same += inputs["input_ids"][row][inputs["attention_mask"][row] == 1].tolist() == expected[i]
+    print(f"prefix reuse gives the same ids as the full prompt for {same}/{len(titles)} titles")
+
+    for label, bucket in (("arrival order", False), ("length-bucketed", True)):
+        ratios = []
+        for _, inputs in classifier.encode(items, args.batch_size, bucket=bucket):
+            mask = inputs["attention_mask"]
+            ratios.append(1 - mask.sum() / mask.size)
+        print(f"{label}: padded-token ratio mean={statistics.mean(ratios):.1%} max={max(ratios):.1%} "
+              f"per batch=[{', '.join(f'{r:.0%}' for r in ratios)}]")
+
+
+#--- Inference backends: parity against quantized torch, then latency and throughput ---
+def load_backends(args):
+    from classifier import current_version, load_artifact
+
+    version = current_version(args.model_dir)
+    if not version:
+        raise SystemExit(f"No artifact in {args.model_dir}, run build_model.py --onnx first")
+    path = f"{args.model_dir}/{version}"
+    classifiers = {}
+    for name in args.backends:
+        backend, _, engine = name.partition(":")
+        classifiers[name] = load_artifact(path, backend, engine or "auto")
+    return classifiers
+
+def bench_parity(args):
+    import sys
+    classifiers = load_backends(args)
+    titles = load_titles(args.db, args.titles)
+    reference_name, *others = args.backends
+    reference = classifiers[reference_name].classify_batch(titles, args.keywords)
+    failed = False
+    for name in others:
+        results = classifiers[name].classify_batch(titles, args.keywords)
+        flipped = sum(a[0] != b[0] for a, b in zip(reference, results))
+        worst = max(abs(a[1] - b[1]) for a, b in zip(reference, results))
+        ok = flipped <= args.max_flips and worst <= args.tolerance
+        failed |= not ok
+        print(f"{name} vs {reference_name}: {flipped} predictions differ, max confidence diff {worst:.4f} "
+              f"-> {'ok' if ok else 'FAIL'}")
+    sys.exit(1 if failed else 0)
+
+def bench_backends(args):
+    classifiers = load_backends(args)
+    titles = load_titles(args.db, args.titles)
+    for name, classifier in classifiers.items():
+        classifier.warm_up()
+        single = []
+        for title in titles[:args.single]:
+            start = time.perf_counter()
+            classifier.classify_tender(title, args.keywords)
+            single.append(time.perf_counter() - start)
+        summarize(f"{name} single-title latency", single)
+        start = time.perf_counter()
+        classifier.classify_batch(titles, args.keywords, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{name} batch={args.batch_size}: {len(titles) / elapsed:.1f} titles/s")
+
+
+#--- Inference worker processes: throughput by workers x threads ---
+def bench_workers(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from classifier import load_classifier, prompt_prefix
+    from inference_pool import InferencePool
+
+    titles = load_titles(args.db, args.titles)
+    prefix = prompt_prefix(args.keywords)
+    batches = [[(prefix, t) for t in titles[i:i + args.batch_size]] for i in range(0, len(titles), args.batch_size)]
+    print(f"{os.cpu_count()} cores, {len(titles)} titles in batches of {args.batch_size}")
+
+    def run(label, classifier, concurrency):
+        classifier.warm_up()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda b: classifier.classify_items(b, args.batch_size), batches))
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {len(titles) / elapsed:.1f} titles/s")
+
+    #before: the API's 4 threads sharing one in-process model, torch using every core in each
+    run("in-process, 4 threads", load_classifier(args.model_dir, args.backend), 4)
+    for config in args.configs:
+        workers, threads = (int(n) for n in config.split("x"))
+        pool = InferencePool(args.model_dir, args.backend, workers=workers, threads=threads)
+        try:
+            run(f"{workers} workers x {threads} threads", pool, workers)
+        finally:
+            pool.close()
+
+
+#--- TF-IDF cascade: thresholds, skip rate and agreement with labels ---
+def bench_cascade(args):
+    from cascade import RelevanceCascade
+    from db import Database
+
+    database = Database(args.db, size=1)
+    start = time.perf_counter()
+    cascade = RelevanceCascade.calibrate(database, args.target_precision, args.min_support)
+    print(f"calibrated in {(time.perf_counter() - start)*1000:.0f}ms: {cascade.stats()}")
+    rows = database.fetchall("SELECT title, keywords, ai_prediction, user_decision FROM tenders")
+    database.close()
+
+    groups = {}
+    for title, keywords, ai_prediction, user_decision in rows:
+        label = user_decision if user_decision is not None else ai_prediction
+        if label is not None and keywords:
+            groups.setdefault(keywords, []).append((title, bool(label)))
+    decided = agree = total = 0
+    elapsed = 0.0
+    for keywords, items in groups.items():
+        start = time.perf_counter()
+        decisions = cascade.decide([t for t, _ in items], keywords.split("|"))
+        elapsed += time.perf_counter() - start
+        for (_, label), decision in zip(items, decisions):
+            total += 1
+            if decision is not None:
+                decided += 1
+                agree += decision[0] == label
+    if total:
+        print(f"{decided}/{total} titles ({decided / total:.1%}) skip the model, "
+              f"{agree}/{decided or 1} of those agree with the label; "
+              f"first stage {elapsed / total * 1e6:.1f}us per title")
+    print("(thresholds are calibrated on these same labels, so hold out data for an unbiased estimate)")
+
+
+#--- Inference suite: sync classifier by batch size and /classify under load, written to JSON ---
+SYNTHETIC_SERVICES = [
+    "Integrated Facilities Management", "Managing Agent Services", "Cleaning Services", "Security Services",
+    "Landscaping and Horticultural Maintenance", "Pest Control Services", "Lift and Escalator Maintenance",
+    "Maintenance of Air-Conditioning and Mechanical Ventilation Systems", "Fire Protection System Maintenance",
+    "Supply and Delivery of Laptops", "Catering Services", "Call for Proposal for AI-Enabled Video Analytics Platform",
+    "Term Contract for Minor Building Works", "Provision of Event Management Services",
+    "Supply, Installation and Maintenance of CCTV Systems", "Waste Collection and Disposal Services",
+    "Provision of Manpower for Carpark Enforcement", "Renovation of Office Premises",
+    "Electrical Installation Maintenance", "Provision of Cloud Hosting Services",
+]
+SYNTHETIC_SITES = [
+    "Government Buildings", "Various Schools", "Rapid Transit Systems (RTS) Link Facility", "Housing Estates",
+    "Community Centres", "Polyclinics", "Changi Airport", "Public Libraries", "Neighbourhood Parks",
+    "Sports Complexes", "Hawker Centres", "Army Camps", "the Civic District", "Jurong Lake District",
+    "One-North", "Punggol Digital District",
+]
+SYNTHETIC_TERMS = ["", " for a Period of 2 Years", " for a Period of 3 Years with Option to Extend",
+                   " (Period Contract)", " - Phase 2", " for FY2025"]
+
+def synthetic_titles(count, seed=0):
+    """Distinct GeBiz-style titles, so none of them hit the classification cache."""
+    import itertools, random
+    combos = list(itertools.product(SYNTHETIC_SERVICES, SYNTHETIC_SITES, SYNTHETIC_TERMS))
+    random.Random(seed).shuffle(combos)
+    return [f"{service} at {site}{term}" for service, site, term in combos[:count]]
+
+def load_csv_titles(path):
+    import csv
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return [row["Title"].strip() for row in csv.DictReader(f) if (row.get("Title") or "").strip()]
+    except FileNotFoundError:
+        return []
+
+def latency_stats(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return {"n": len(samples), "mean_ms": round(statistics.mean(samples) * 1000, 2),
+            "p50_ms": round(pick(0.5), 2), "p95_ms": round(pick(0.95), 2), "p99_ms": round(pick(0.99), 2)}
+
+def peak_rss_mb(pid=None):
+    #VmHWM is the high-water mark of resident memory, readable for child processes too
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        import resource, sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return None
+
+def suite_sync(args, titles):
+    start = time.perf_counter()
+    from classifier import load_classifier
+    classifier = load_classifier(args.model_dir, args.backend, args.engine)
+    loaded = time.perf_counter()
+    classifier.warm_up()
+    results = {"load_s": round(loaded - start, 3), "warm_up_s": round(time.perf_counter() - loaded, 3),
+               "model_version": classifier.cache_version, "batches": {}}
+    print(f"sync: loaded {classifier.cache_version} in {results['load_s']}s, first forward {results['warm_up_s']}s")
+    for batch_size in args.batch_sizes:
+        latencies = []
+        start = time.perf_counter()
+        for i in range(0, len(titles), batch_size):
+            batch_start = time.perf_counter()
+            classifier.classify_batch(titles[i:i + batch_size], args.keywords, batch_size)
+            latencies.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+        stats = {**latency_stats(latencies), "titles_per_s": round(len(titles) / elapsed, 1)}
+        results["batches"][str(batch_size)] = stats
+        print(f"sync batch={batch_size:<4} {stats['titles_per_s']} titles/s, per batch p50={stats['p50_ms']}ms "
+              f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def start_bench_server(workdir, env):
+    """The API on a free local port, run in `workdir` so its SQLite files (and classification cache) start empty."""
+    import socket, subprocess, sys
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = {
+        **os.environ,
+        "METABASE_SECRET_KEY": os.getenv("METABASE_SECRET_KEY", "bench"),
+        "ABSTRACT_API_KEY": os.getenv("ABSTRACT_API_KEY", "bench"),
+        "SCRAPER_POOL_SIZE": "0",  #no Chrome
+        **env,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+def wait_for_server(server, url, timeout):
+    import httpx
+    deadline = time.perf_counter() + timeout
+    while True:
+        if server and server.poll() is not None:
+            raise SystemExit(f"bench server exited with {server.returncode}")
+        try:
+            httpx.get(f"{url}/", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"bench server not up after {timeout}s")
+            time.sleep(0.2)
+
+def suite_http(args, titles):
+    import httpx, tempfile, threading
+
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            server, url = start_bench_server(workdir, {
+                "CLASSIFIER_MODEL_DIR": os.path.abspath(args.model_dir),
+                "CLASSIFIER_BACKEND": args.backend,
+                "CLASSIFIER_TORCH_ENGINE": args.engine,
+                "CASCADE_ENABLED": "1" if args.cascade else "0",
+            })
+        try:
+            start = time.perf_counter()
+            wait_for_server(server, url, args.startup_timeout)
+            ready = time.perf_counter()
+            #the first /classify waits for the model to load and warm up
+            httpx.post(f"{url}/classify", json={"tenders": SAMPLE_TITLES[:1], "keywords": args.keywords},
+                       timeout=args.startup_timeout).raise_for_status()
+            results = {"url": url if args.url else None, "startup_s": round(ready - start, 3),
+                       "first_classify_s": round(time.perf_counter() - ready, 3), "concurrency": {}}
+
+            position = 0
+            for clients in args.concurrency:
+                requests_ = []
+                for _ in range(args.requests):
+                    requests_.append([titles[(position + k) % len(titles)] for k in range(args.request_size)])
+                    position += args.request_size
+                latencies, skipped, errors = [], [], []
+                lock = threading.Lock()
+                def client(chunk):
+                    with httpx.Client(timeout=60) as http:
+                        for tenders in chunk:
+                            sent = time.perf_counter()
+                            try:
+                                r = http.post(f"{url}/classify", json={"tenders": tenders, "keywords": args.keywords})
+                                r.raise_for_status()
+                            except httpx.HTTPError as e:
+                                with lock:
+                                    errors.append(str(e))
+                                continue
+                            with lock:
+                                latencies.append(time.perf_counter() - sent)
+                                skipped.append(float(r.headers.get("X-Model-Skipped-Fraction", 0)))
+                threads = [threading.Thread(target=client, args=(requests_[i::clients],)) for i in range(clients)]
+                start = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                elapsed = time.perf_counter() - start
+                stats = {**(latency_stats(latencies) if latencies else {"n": 0}),
+                         "requests_per_s": round(len(latencies) / elapsed, 1),
+                         "titles_per_s": round(len(latencies) * args.request_size / elapsed, 1),
+                         "errors": len(errors),
+                         "model_skipped_fraction": round(statistics.mean(skipped), 3) if skipped else None}
+                results["concurrency"][str(clients)] = stats
+                print(f"http clients={clients:<3} {stats['titles_per_s']} titles/s, request "
+                      f"p50={stats.get('p50_ms')}ms p95={stats.get('p95_ms')}ms p99={stats.get('p99_ms')}ms, "
+                      f"{len(errors)} errors" + (f" (first: {errors[0]})" if errors else ""))
+            results["server_peak_rss_mb"] = peak_rss_mb(server.pid) if server else None
+            return results
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+def suite_headlines(results):
+    #(metric path, True if higher is better) for --compare
+    found = [(("sync", "load_s"), False), (("sync", "peak_rss_mb"), False)]
+    for size in results.get("sync", {}).get("batches", {}):
+        found += [(("sync", "batches", size, "titles_per_s"), True), (("sync", "batches", size, "p95_ms"), False)]
+    for clients in results.get("http", {}).get("concurrency", {}):
+        found += [(("http", "concurrency", clients, "titles_per_s"), True),
+                  (("http", "concurrency", clients, "p95_ms"), False)]
+    return found
+
+def compare_results(previous, current, max_regression):
+    """Print each headline metric against a previous run; returns the number that regressed."""
+    regressions = 0
+    for path, higher_is_better in suite_headlines(current):
+        old, new = previous, current
+        for key in path:
+            old = old.get(key, {}) if isinstance(old, dict) else {}
+            new = new.get(key, {}) if isinstance(new, dict) else {}
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        regressed = worse > max_regression
+        regressions += regressed
+        print(f"{'.'.join(path)}: {old} -> {new} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def bench_suite(args):
+    import json, platform, random, subprocess, sys
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")  #everything comes from the local artifact
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    real = load_csv_titles(args.csv)
+    titles = real + synthetic_titles(max(0, args.titles - len(real)), args.seed)
+    random.Random(args.seed).shuffle(titles)
+    titles = titles[:args.titles]
+    print(f"{len(titles)} titles: {min(len(real), len(titles))} from {args.csv}, the rest synthetic")
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "func"},
+    }
+    if not args.skip_sync:
+        results["sync"] = suite_sync(args, titles)
+    if not args.skip_http:
+        results["http"] = suite_http(args, titles)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"against {args.compare} (commit {previous.get('commit')}):")
+        sys.exit(1 if compare_results(previous, results, args.max_regression) else 0)
+
+
+#--- Database access: connection per call vs pooled WAL connections, then authenticated requests ---
+def bench_auth(args):
+    import sqlite3, tempfile, threading, bcrypt
+    from concurrent.futures import ThreadPoolExecutor
+    from db import Database
+
+    with tempfile.TemporaryDirectory() as workdir:
+        users_path = os.path.join(workdir, "users.db")
+        conn = sqlite3.connect(users_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, "
+                     "email TEXT, hashed_password TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+                         [(f"user{i}", f"user{i}@example.com", "x" * 60) for i in range(args.users)])
+        conn.commit()
+        conn.close()
+        query = "SELECT username, email, hashed_password FROM users WHERE username = ?"
+
+        #before: what get_user did for every authenticated request
+        def connect_per_call(username):
+            conn = sqlite3.connect(users_path)
+            row = conn.execute(query, (username,)).fetchone()
+            conn.close()
+            return row
+        pooled = Database(users_path, size=args.clients)
+        for label, lookup in (("connect per call", connect_per_call),
+                              ("pooled WAL", lambda username: pooled.fetchone(query, (username,)))):
+            names = [f"user{i % args.users}" for i in range(args.lookups)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                list(pool.map(lookup, names))
+            elapsed = time.perf_counter() - start
+            print(f"user lookup, {label}: {len(names) / elapsed:.0f}/s over {args.clients} threads")
+        pooled.close()
+
+    if args.skip_http:
+        return
+    import httpx
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            url, username, password = args.url.rstrip("/"), args.username, args.password
+        else:
+            server, url = start_bench_server(workdir, {"CLASSIFIER_MODEL_DIR": os.path.abspath(args.model_dir),
+                                                       "CASCADE_ENABLED": "0"})
+            username, password = "bench", "Bench-pass1"
+        try:
+            wait_for_server(server, url, args.startup_timeout)
+            if server:
+                #/register checks the email with an external service; add the account directly
+                conn = sqlite3.connect(os.path.join(workdir, "users.db"))
+                conn.execute("INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+                             (username, "bench@example.com", bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()))
+                conn.commit()
+                conn.close()
+            login = httpx.post(f"{url}/login", json={"username": username, "password": password}, timeout=30)
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            for clients in args.concurrency:
+                latencies, errors = [], []
+                lock = threading.Lock()
+                def client(count):
+                    with httpx.Client(timeout=30, headers=headers) as http:
+                        for _ in range(count):
+                            sent = time.perf_counter()
+                            try:
+                                http.get(f"{url}{args.path}").raise_for_status()
+                            except httpx.HTTPError as e:
+                                with lock:
+                                    errors.append(str(e))
+                                continue
+                            with lock:
+                                latencies.append(time.perf_counter() - sent)
+                threads = [threading.Thread(target=client, args=(args.requests // clients,)) for _ in range(clients)]
+                start = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                elapsed = time.perf_counter() - start
+                stats = latency_stats(latencies) if latencies else {}
+                print(f"GET {args.path}, {clients} clients: {len(latencies) / elapsed:.0f} requests/s, "
+                      f"p50={stats.get('p50_ms')}ms p99={stats.get('p99_ms')}ms, {len(errors)} errors")
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+
+#--- /save-decisions: wipe and insert row by row vs one upsert transaction ---
+def synthetic_decisions(count, seed=0):
+    import random
+    rng = random.Random(seed)
+    titles = synthetic_titles(count, seed)
+    return [{
+        "title": titles[i % len(titles)], "tender_number": f"BENCH{i:07d}ETT", "agency": "Bench Agency",
+        "ref_number": None, "awarded": "OPEN", "awardee": None, "respondents": "N/A", "num_of_respondents": 0,
+        "keywords": ["Facilities Management", "Managing Agent"], "ai_prediction": rng.random() < 0.3,
+        "ai_confidence": round(rng.random(), 4), "user_decision": rng.random() < 0.3,
+    } for i in range(count)]
+
+def bench_decisions(args):
+    import sqlite3, tempfile
+    from db import Database
+    from decisions import DECISION_COLUMNS, decision_row, upsert_decisions
+    from schema import TENDERS_MIGRATIONS
+
+    decisions = synthetic_decisions(args.decisions)
+    with tempfile.TemporaryDirectory() as workdir:
+        #before: clear the table, then one connection, insert and commit per decision
+        path = os.path.join(workdir, "before.db")
+        Database(path).migrate(TENDERS_MIGRATIONS)
+        insert = (f"INSERT INTO tenders ({', '.join(DECISION_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(DECISION_COLUMNS))})")
+        start = time.perf_counter()
+        conn = sqlite3.connect(path)
+        conn.execute("DELETE FROM tenders")
+        conn.commit()
+        conn.close()
+        for decision in decisions:
+            conn = sqlite3.connect(path)
+            conn.execute(insert, decision_row(decision))
+            conn.commit()
+            conn.close()
+        before = time.perf_counter() - start
+        print(f"wipe + row by row: {before:.2f}s for {len(decisions)} decisions ({len(decisions) / before:.0f}/s)")
+
+        database = Database(os.path.join(workdir, "after.db"))
+        database.migrate(TENDERS_MIGRATIONS)
+        edited = [dict(d, user_decision=not d["user_decision"]) if i % 10 == 0 else d for i, d in enumerate(decisions)]
+        for label, payload in (("upsert, empty table", decisions), ("upsert, same payload again", decisions),
+                               ("upsert, 10% of decisions changed", edited)):
+            start = time.perf_counter()
+            counts = upsert_decisions(database, payload)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {elapsed:.2f}s ({len(payload) / elapsed:.0f}/s, {before / elapsed:.0f}x) {counts}")
+        rows = database.fetchone("SELECT COUNT(*) FROM tenders")[0]
+        print(f"{rows} rows after three saves of the same {len(decisions)} tenders")
+        database.close()
+
+
+#--- Refresh tokens: lookups at a million rows before and after the index, then compaction ---
+def bench_tokens(args):
+    import random, secrets, tempfile
+    from datetime import datetime, timedelta
+    from db import Database
+    from schema import REFRESH_TOKENS_MIGRATIONS, compact_refresh_tokens
+
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as workdir:
+        database = Database(os.path.join(workdir, "refresh_tokens.db"))
+        database.migrate(REFRESH_TOKENS_MIGRATIONS[:1])  #the table as it was, no indexes
+        start = time.perf_counter()
+        sample = []
+        for batch_start in range(0, args.rows, 50000):
+            rows = []
+            for i in range(batch_start, min(args.rows, batch_start + 50000)):
+                username = f"user{rng.randrange(args.users)}"
+                token = secrets.token_hex(32)
+                issued = now - timedelta(days=rng.uniform(0, args.days))
+                rows.append((username, token, issued))
+            database.executemany("INSERT INTO refresh_tokens (username, token, created_at) VALUES (?, ?, ?)", rows)
+            sample.extend(rng.sample(rows, min(len(rows), args.lookups // 10 + 1)))
+        print(f"{args.rows} tokens over {args.days} days for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+        query = "SELECT 1 FROM refresh_tokens WHERE username = ? AND token = ?"
+        def lookups(label, count):
+            latencies = []
+            for username, token, _ in rng.sample(sample, min(count, len(sample))):
+                start = time.perf_counter()
+                database.fetchone(query, (username, token))
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1e6
+            print(f"{label}: n={len(latencies)} p50={pick(0.5):.0f}us p99={pick(0.99):.0f}us")
+
+        lookups("lookup, schema v1 (full scan)", args.scan_lookups)
+        start = time.perf_counter()
+        database.migrate(REFRESH_TOKENS_MIGRATIONS)
+        print(f"migrated to v{len(REFRESH_TOKENS_MIGRATIONS)} in {time.perf_counter() - start:.1f}s")
+        lookups("lookup, indexed", args.lookups)
+
+        start = time.perf_counter()
+        removed = compact_refresh_tokens(database, now - timedelta(days=args.expire_days))
+        left = database.fetchone("SELECT COUNT(*) FROM refresh_tokens")[0]
+        print(f"compaction removed {removed} tokens older than {args.expire_days} days in "
+              f"{time.perf_counter() - start:.1f}s, {left} left")
+        lookups("lookup, indexed after compaction", args.lookups)
+        database.close()
+
+
+#--- Metabase listings: login + blocking GET per request vs pooled client with cached session and lists ---
+def start_standin_metabase(args):
+    """A local stand-in for the Metabase API: /api/session, /api/dashboard and /api/card with fixed latency."""
+    import json, secrets, threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    items = [{"id": i, "name": f"Item {i}", "enable_embedding": i % 3 == 0} for i in range(args.items)]
+    state = {"sessions": set(), "logins": 0, "lists": 0, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  #keep-alive, so pooled clients can reuse connections
+
+        def log_message(self, *_):
+            pass
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(args.login_ms / 1000)
+            token = secrets.token_hex(16)
+            with lock:
+                state["sessions"].add(token)
+                state["logins"] += 1
+            self.reply(200, {"id": token})
+
+        def do_GET(self):
+            time.sleep(args.list_ms / 1000)
+            with lock:
+                state["requests"] += 1
+                if args.expire_every and state["requests"] % args.expire_every == 0:
+                    state["sessions"].clear()  #as if Metabase restarted or the session aged out
+                if self.headers.get("X-Metabase-Session") not in state["sessions"]:
+                    return self.reply(401, "Unauthenticated")
+                state["lists"] += 1
+            self.reply(200, items)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", state
+
+def bench_metabase(args):
+    import asyncio, requests
+    from metabase import MetabaseClient
+
+    server, url, state = start_standin_metabase(args)
+
+    #before: what the endpoints did, a login and a blocking GET on the event loop for every call
+    async def blocking_listing():
+        session = requests.post(f"{url}/api/session", json={"username": "u", "password": "p"}).json()["id"]
+        data = requests.get(f"{url}/api/dashboard", headers={"X-Metabase-Session": session}).json()
+        return [{"id": d["id"], "name": d["name"]} for d in data if d.get("enable_embedding") is True]
+
+    async def run(label, call):
+        latencies, errors = [], []
+        async def client(count):
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    await call()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append(time.perf_counter() - start)
+        before = dict(state, sessions=None)
+        start = time.perf_counter()
+        await asyncio.gather(*(client(args.requests // args.clients) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - start
+        stats = latency_stats(latencies) if latencies else {}
+        print(f"{label}: {len(latencies) / elapsed:.0f} listings/s, p50={stats.get('p50_ms')}ms "
+              f"p99={stats.get('p99_ms')}ms, {len(errors)} errors; Metabase saw "
+              f"{state['logins'] - before['logins']} logins, {state['lists'] - before['lists']} list fetches")
+
+    async def main():
+        await run("per-request login, blocking", blocking_listing)
+        for label, list_ttl in (("pooled client, cached session, no list cache", 0),
+                                (f"pooled client, cached session, {args.list_ttl}s list cache", args.list_ttl)):
+            metabase = MetabaseClient(url, "u", "p", list_ttl=list_ttl, max_stale=0 if not list_ttl else 600,
+                                      max_connections=args.clients)
+            await run(label, metabase.embeddable_dashboards)
+            print(f"  client stats: {metabase.stats()}")
+            await metabase.aclose()
+
+    print(f"{args.clients} concurrent callers, {args.requests} listings each run; stand-in Metabase "
+          f"login {args.login_ms}ms, list {args.list_ms}ms, {args.items} items"
+          + (f", sessions dropped every {args.expire_every} GETs" if args.expire_every else ""))
+    try:
+        asyncio.run(main())
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    detail = sub.add_parser("detail", help="per-tender latency of the HTTP and Selenium detail paths")
+    detail.add_argument("--keyword", default="Facilities Management")
+    detail.add_argument("--limit", type=int, default=10)
+    detail.add_argument("--html-dir", help="time the parser alone against saved detail pages")
+    detail.set_defaults(func=bench_detail)
+
+    driver = sub.add_parser("driver", help="Chrome startup time and bytes per tender, before and after")
+    driver.add_argument("--keyword", default="Facilities Management")
+    driver.add_argument("--limit", type=int, default=5)
+    driver.add_argument("--startups", type=int, default=3)
+    driver.add_argument("--skip-headed", action="store_true", help="skip the headed profile (no display available)")
+    driver.set_defaults(func=bench_driver)
+
+    classify = sub.add_parser("classify", help="classifier throughput, per-title vs batched")
+    classify.add_argument("--model-dir", default="models")
+    classify.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db",
+                          help="tenders db to take titles from (falls back to built-in samples)")
+    classify.add_argument("--titles", type=int, default=500)
+    classify.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+    classify.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    classify.set_defaults(func=bench_classify)
+
+    batcher = sub.add_parser("batcher", help="many concurrent small classify requests, with and without the shared batcher")
+    batcher.add_argument("--model-dir", default="models")
+    batcher.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+    batcher.add_argument("--clients", type=int, default=16)
+    batcher.add_argument("--requests", type=int, default=200)
+    batcher.add_argument("--request-size", type=int, default=2, help="titles per request")
+    batcher.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+    batcher.add_argument("--batch-size", type=int, default=32)
+    batcher.add_argument("--max-wait-ms", type=float, default=10)
+    batcher.set_defaults(func=bench_batcher)
+
+    tokenize = sub.add_parser("tokenize", help="tokenization cost and padded-token ratio per batch")
+    tokenize.add_argument("--model-dir", default="models")
+    tokenize.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+    tokenize.add_argument("--titles", type=int, default=500)
+    tokenize.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+    tokenize.add_argument("--batch-size", type=int, default=32)
+    tokenize.set_defaults(func=bench_tokenize)
+
+    for name, func, help_ in (("parity", bench_parity, "check backends agree with the first one; exits 1 if not"),
+                              ("backends", bench_backends, "latency and throughput per inference backend")):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("--model-dir", default="models", help="built with build_model.py --onnx")
+        p.add_argument("--backends", nargs="+", default=["torch:fbgemm", "torch:qnnpack", "onnx"],
+                       help="backend[:torch engine]; parity compares against the first")
+        p.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+        p.add_argument("--titles", type=int, default=500)
+        p.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+        p.set_defaults(func=func)
+    parity = sub.choices["parity"]
+    parity.add_argument("--tolerance", type=float, default=0.05, help="max confidence difference")
+    parity.add_argument("--max-flips", type=int, default=0, help="predictions allowed to differ")
+    backends = sub.choices["backends"]
+    backends.add_argument("--batch-size", type=int, default=32)
+    backends.add_argument("--single", type=int, default=100, help="titles timed one at a time")
+
+    workers = sub.add_parser("workers", help="throughput of inference worker processes, by workers x threads")
+    workers.add_argument("--model-dir", default="models")
+    workers.add_argument("--backend", default="torch")
+    workers.add_argument("--configs", nargs="+", default=["1x1", "2x1", "4x1", "1x4", "2x2"], help="WORKERSxTHREADS")
+    workers.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+    workers.add_argument("--titles", type=int, default=1000)
+    workers.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+    workers.add_argument("--batch-size", type=int, default=32)
+    workers.set_defaults(func=bench_workers)
+
+    cascade = sub.add_parser("cascade", help="TF-IDF first stage: calibrated thresholds and model skip rate")
+    cascade.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+    cascade.add_argument("--target-precision", type=float, default=0.97)
+    cascade.add_argument("--min-support", type=int, default=50)
+    cascade.set_defaults(func=bench_cascade)
+
+    coldstart = sub.add_parser("coldstart", help="classifier start-up time, pretrained + quantize vs saved artifact")
+    coldstart.add_argument("--model-dir", default="models", help="built with build_model.py")
+    coldstart.add_argument("--runs", type=int, default=3)
+    coldstart.add_argument("--skip-pretrained", action="store_true", help="only time the artifact (no network)")
+    coldstart.set_defaults(func=bench_coldstart)
+
+    suite = sub.add_parser("suite", help="offline inference suite: sync batch sizes and /classify under load, to JSON")
+    suite.add_argument("--model-dir", default="models", help="built with build_model.py")
+    suite.add_argument("--backend", default="torch")
+    suite.add_argument("--engine", default="auto", help="torch quantized engine")
+    suite.add_argument("--csv", default="../gebiz_tenders.csv", help="real titles; synthetic ones fill the rest")
+    suite.add_argument("--titles", type=int, default=512)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--keywords", nargs="+", default=["Facilities Management"])
+    suite.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128])
+    suite.add_argument("--url", help="load an already running API instead of starting one")
+    suite.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="concurrent clients")
+    suite.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    suite.add_argument("--request-size", type=int, default=4, help="titles per request")
+    suite.add_argument("--cascade", action="store_true", help="leave the TF-IDF stage on in the started API")
+    suite.add_argument("--startup-timeout", type=float, default=120)
+    suite.add_argument("--skip-sync", action="store_true")
+    suite.add_argument("--skip-http", action="store_true")
+    suite.add_argument("--out", default="bench-results.json")
+    suite.add_argument("--compare", help="earlier results file; exits 1 if a headline metric regressed")
+    suite.add_argument("--max-regression", type=float, default=0.1, help="allowed relative slowdown")
+    suite.set_defaults(func=bench_suite)
+
+    auth = sub.add_parser("auth", help="user lookups per call vs pooled, then authenticated request throughput")
+    auth.add_argument("--users", type=int, default=1000)
+    auth.add_argument("--lookups", type=int, default=20000)
+    auth.add_argument("--clients", type=int, default=8, help="threads doing lookups")
+    auth.add_argument("--skip-http", action="store_true")
+    auth.add_argument("--model-dir", default="models", help="for the API it starts")
+    auth.add_argument("--url", help="load an already running API (e.g. an older commit) instead of starting one")
+    auth.add_argument("--username", help="existing account, with --url")
+    auth.add_argument("--password")
+    auth.add_argument("--path", default="/classify/metrics", help="authenticated endpoint to request")
+    auth.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    auth.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    auth.add_argument("--startup-timeout", type=float, default=120)
+    auth.set_defaults(func=bench_auth)
+
+    decisions = sub.add_parser("decisions", help="/save-decisions writes: wipe and row-by-row inserts vs one upsert")
+    decisions.add_argument("--decisions", type=int, default=10000)
+    decisions.set_defaults(func=bench_decisions)
+
+    tokens = sub.add_parser("tokens", help="refresh token lookups at a million rows, before and after migrating, and compaction")
+    tokens.add_argument("--rows", type=int, default=1000000)
+    tokens.add_argument("--users", type=int, default=5000)
+    tokens.add_argument("--days", type=float, default=30, help="tokens are issued over this many past days")
+    tokens.add_argument("--expire-days", type=float, default=7, help="REFRESH_EXPIRE")
+    tokens.add_argument("--lookups", type=int, default=2000)
+    tokens.add_argument("--scan-lookups", type=int, default=20, help="lookups timed before the index")
+    tokens.set_defaults(func=bench_tokens)
+
+    metabase = sub.add_parser("metabase", help="/dashboards listing against a local stand-in Metabase, before and after")
+    metabase.add_argument("--clients", type=int, default=32, help="concurrent callers")
+    metabase.add_argument("--requests", type=int, default=640, help="listings per run")
+    metabase.add_argument("--items", type=int, default=300, help="dashboards the stand-in returns")
+    metabase.add_argument("--login-ms", type=float, default=50)
+    metabase.add_argument("--list-ms", type=float, default=20)
+    metabase.add_argument("--list-ttl", type=float, default=60)
+    metabase.add_argument("--expire-every", type=int, default=100, help="drop all sessions every N GETs (0 never)")
+    metabase.set_defaults(func=bench_metabase)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Build the classifier artifact the API loads at startup. Run from the backend folder:
+
+    python build_model.py                          #quantize distilbert-base-uncased
+    python build_model.py --source path/to/checkpoint
+    python build_model.py --onnx                   #also export int8 ONNX for CLASSIFIER_BACKEND=onnx
+
+Needs the source weights (network access for a hub name) once; the API then
+starts from the saved quantized model without downloading or quantizing.
+"""
+import argparse, os
+from classifier import build_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="distilbert-base-uncased", help="hub model name or local checkpoint")
+    parser.add_argument("--model-dir", default=os.getenv("CLASSIFIER_MODEL_DIR", "models"))
+    parser.add_argument("--onnx", action="store_true", help="also export an int8 ONNX model (needs onnx and onnxruntime)")
+    args = parser.parse_args()
+
+    version = build_artifact(args.model_dir, source=args.source, onnx=args.onnx)
+    print(f"Built {os.path.join(args.model_dir, version)} and made it current")
+
+
+if __name__ == "__main__":
+    main()
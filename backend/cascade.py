@@ -0,0 +1,138 @@
+import math, re, threading
+import numpy as np
+
+
+def tokenize(text):
+    #lowercase words with plurals folded, so "Facility" matches "Facilities"
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return [w[:-3] + "y" if w.endswith("ies") and len(w) > 4 else
+            w[:-1] if w.endswith("s") and not w.endswith("ss") and len(w) > 3 else w
+            for w in words]
+
+
+class RelevanceCascade:
+    """TF-IDF first stage: titles scoring at or above `high` are relevant, at or below `low` irrelevant.
+
+    Everything in between, or on a side whose threshold is None, goes to the model.
+    """
+    def __init__(self, idf=None, low=None, high=None, low_precision=None, high_precision=None):
+        self.idf = idf or {}
+        self.default_idf = max(self.idf.values(), default=1.0)  #unseen words are as rare as the rarest seen
+        self.low, self.high = low, high
+        self.low_precision, self.high_precision = low_precision, high_precision
+        self.labelled = 0
+        self._lock = threading.Lock()
+        self._decided = 0
+        self._total = 0
+
+    def _matrix(self, texts):
+        vocab = {}
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                rows.append(row)
+                cols.append(vocab.setdefault(token, len(vocab)))
+        matrix = np.zeros((len(texts), max(1, len(vocab))))
+        np.add.at(matrix, (rows, cols), 1.0)
+        if vocab:
+            matrix *= np.array([self.idf.get(token, self.default_idf) for token in vocab])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def scores(self, titles, keywords):
+        """Best cosine similarity of each title to any single keyword, for the whole batch at once."""
+        keywords = [k for k in keywords if k.strip()]
+        if not titles or not keywords:
+            return np.zeros(len(titles))
+        matrix = self._matrix(list(titles) + keywords)
+        return (matrix[:len(titles)] @ matrix[len(titles):].T).max(axis=1)
+
+    def decide(self, titles, keywords):
+        """(ai_prediction, ai_confidence) where the first stage is sure, None where the model has to run."""
+        decisions = [None] * len(titles)
+        if (self.low is not None or self.high is not None) and titles:
+            for i, score in enumerate(self.scores(titles, keywords)):
+                if self.high is not None and score >= self.high:
+                    decisions[i] = (True, self.high_precision)
+                elif self.low is not None and score <= self.low:
+                    decisions[i] = (False, self.low_precision)
+        with self._lock:
+            self._decided += sum(d is not None for d in decisions)
+            self._total += len(titles)
+        return decisions
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calibrated": self.low is not None or self.high is not None,
+                "labelled_tenders": self.labelled,
+                "low": self.low, "low_precision": self.low_precision,
+                "high": self.high, "high_precision": self.high_precision,
+                "titles": self._total,
+                "skipped_model": self._decided,
+                "skipped_fraction": round(self._decided / self._total, 3) if self._total else 0.0,
+            }
+
+    @classmethod
+    def calibrate(cls, database, target_precision=0.97, min_support=50):
+        """Build IDF weights and thresholds from the tenders table of the tenders Database.
+
+        The label of a tender is the user's decision, or the model's
+        prediction where the user never gave one. `high` is the lowest score
+        whose band (score >= high) is at least `target_precision` relevant
+        over at least `min_support` tenders; `low` likewise from the bottom.
+        """
+        rows = database.fetchall("SELECT title, keywords, ai_prediction, user_decision FROM tenders")
+
+        documents = [set(tokenize(title)) for title, _, _, _ in rows]
+        frequency = {}
+        for tokens in documents:
+            for token in tokens:
+                frequency[token] = frequency.get(token, 0) + 1
+        idf = {t: math.log((1 + len(documents)) / (1 + n)) + 1 for t, n in frequency.items()}
+        cascade = cls(idf)
+
+        #score each labelled tender against the keywords it was scraped for
+        groups = {}
+        for title, keywords, ai_prediction, user_decision in rows:
+            label = user_decision if user_decision is not None else ai_prediction
+            if label is not None and keywords:
+                groups.setdefault(keywords, []).append((title, bool(label)))
+        scores, labels = [], []
+        for keywords, items in groups.items():
+            scores.extend(cascade.scores([t for t, _ in items], keywords.split("|")))
+            labels.extend(label for _, label in items)
+        cascade.labelled = len(labels)
+        if len(labels) < 2 * min_support:
+            return cascade
+
+        order = np.argsort(scores)
+        scores = np.asarray(scores)[order]
+        labels = np.asarray(labels)[order]
+        n = len(scores)
+        relevant_below = np.cumsum(labels)  #relevant tenders among the lowest i+1 scores
+
+        low = low_precision = None
+        for i in range(n - 1, min_support - 2, -1):
+            if i + 1 < n and scores[i] == scores[i + 1]:
+                continue  #a threshold has to take every tender with the same score
+            precision = 1 - relevant_below[i] / (i + 1)
+            if precision >= target_precision:
+                low, low_precision = float(scores[i]), round(float(precision), 3)
+                break
+
+        high = high_precision = None
+        total_relevant = relevant_below[-1]
+        for i in range(0, n - min_support + 1):
+            if i > 0 and scores[i] == scores[i - 1]:
+                continue
+            precision = (total_relevant - (relevant_below[i - 1] if i else 0)) / (n - i)
+            if precision >= target_precision:
+                high, high_precision = float(scores[i]), round(float(precision), 3)
+                break
+
+        if low is not None and high is not None and low >= high:
+            return cascade  #the bands overlap, no clean split in the labels; leave everything to the model
+        cascade.low, cascade.high = low, high
+        cascade.low_precision, cascade.high_precision = low_precision, high_precision
+        return cascade
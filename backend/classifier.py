@@ -0,0 +1,299 @@
+import gc, hashlib, json, os, shutil, threading
+import numpy as np
+import torch
+from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+from backends import ONNX_FILE, OnnxBackend, TorchBackend, export_onnx, resolve_engine, softmax
+
+
+MODEL_NAME = "distilbert-base-uncased"
+MAX_LENGTH = 128
+
+#a model directory holds one subfolder per built version and a CURRENT file naming the live one
+CURRENT_FILE = "CURRENT"
+HISTORY_FILE = "HISTORY"  #every version made current, oldest first, for rollback
+WEIGHTS_FILE = "quantized.pt"
+META_FILE = "meta.json"
+
+
+def weights_fingerprint(model):
+    """Hash of the model's weights; changes whenever the model is retrained or swapped."""
+    digest = hashlib.sha1(MODEL_NAME.encode())
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def quantize(model, engine="auto"):
+    torch.backends.quantized.engine = resolve_engine(engine)
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return quantized
+
+def prompt_prefix(keywords: list[str]):
+    #keywords in a fixed order, so the same keyword set always gives the same prompt (and cache key)
+    keywords = sorted({k.strip() for k in keywords if k.strip()}, key=str.lower)
+    return f"Determine tender relevance for {', '.join(keywords)}: "
+
+def build_prompt(tender_title: str, keywords: list[str]):
+    return prompt_prefix(keywords) + tender_title
+
+
+class Classifier:
+    """The DistilBERT relevance model: tokenizer, an inference backend and the weights version.
+
+    Work items are (prefix, title) pairs, the prefix being the keyword part of
+    the prompt. Each distinct prefix is tokenized once and its ids reused for
+    every title; WordPiece never merges across the ": " that ends it, so the
+    ids are the same as tokenizing the whole prompt.
+    """
+    def __init__(self, tokenizer, backend, version, max_prefixes=256):
+        self.tokenizer = tokenizer
+        self.backend = backend
+        self.version = version
+        self.max_prefixes = max_prefixes
+        self._prefixes = {}
+
+    @property
+    def cache_version(self):
+        #backends agree within tolerance, not bit for bit, so cached results are kept per backend
+        return f"{self.version}:{self.backend.name}"
+
+    def _prefix_ids(self, prefix):
+        ids = self._prefixes.get(prefix)
+        if ids is None:
+            ids = self.tokenizer(prefix, add_special_tokens=False)["input_ids"]
+            if len(self._prefixes) >= self.max_prefixes:
+                self._prefixes.clear()
+            self._prefixes[prefix] = ids
+        return ids
+
+    def encode(self, items, batch_size=32, bucket=True):
+        """Token ids for (prefix, title) pairs, as padded batches of at most `batch_size`.
+
+        With `bucket`, items are sorted by token length first so each batch
+        holds similar lengths and little padding. Yields (positions, inputs),
+        positions being the indices in `items` of the batch's rows.
+        """
+        title_ids = self.tokenizer([title for _, title in items], add_special_tokens=False)["input_ids"]
+        cls, sep, pad = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id, self.tokenizer.pad_token_id
+        sequences = [
+            [cls] + (self._prefix_ids(prefix) + ids)[:MAX_LENGTH - 2] + [sep]
+            for (prefix, _), ids in zip(items, title_ids)
+        ]
+        order = list(range(len(sequences)))
+        if bucket:
+            order.sort(key=lambda i: len(sequences[i]))
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            width = max(len(sequences[i]) for i in positions)
+            input_ids = [sequences[i] + [pad] * (width - len(sequences[i])) for i in positions]
+            attention_mask = [[1] * len(sequences[i]) + [0] * (width - len(sequences[i])) for i in positions]
+            yield positions, {"input_ids": np.array(input_ids, dtype=np.int64),
+                              "attention_mask": np.array(attention_mask, dtype=np.int64)}
+
+    def classify_items(self, items, batch_size: int = 32):
+        """Classify (prefix, title) pairs, `batch_size` per forward pass.
+
+        The attention mask keeps padding out of the result. Returns
+        (ai_prediction, ai_confidence) pairs in the same order as `items`.
+        """
+        results = [None] * len(items)
+        for positions, inputs in self.encode(items, batch_size):
+            probabilities = softmax(self.backend.logits(**inputs))
+            predictions, confidences = probabilities.argmax(axis=1), probabilities.max(axis=1)
+            for i, p, c in zip(positions, predictions.tolist(), confidences.tolist()):
+                results[i] = (bool(p), float(c))
+        return results
+
+    def classify_versioned(self, items, batch_size: int = 32):
+        """(cache_version, results) for `items`, so callers can cache results under the model that produced them."""
+        return self.cache_version, self.classify_items(items, batch_size)
+
+    def classify_batch(self, tender_titles: list[str], keywords: list[str], batch_size: int = 32):
+        """Classify many titles for one keyword set, in request order."""
+        prefix = prompt_prefix(keywords)
+        return self.classify_items([(prefix, title) for title in tender_titles], batch_size)
+
+    def classify_tender(self, tender_title: str, keywords: list[str]):
+        """Classify tender relevance using DistilBERT (synchronous version)"""
+        return self.classify_batch([tender_title], keywords)[0]
+
+    def warm_up(self):
+        #the first forward pass allocates and packs kernels; pay for it before a user does
+        self.classify_batch(["warm up"], ["warm up"])
+
+
+#--- Model artifacts ---
+def build_artifact(model_dir, source=MODEL_NAME, onnx=False, meta=None):
+    """Quantize `source` (a hub name or local checkpoint) and save it with its tokenizer as a new version.
+
+    With `onnx`, an int8 ONNX export is saved next to the PyTorch model, and
+    `meta` adds fields to meta.json. The version directory is written under a
+    temporary name and renamed into place, then made CURRENT, so a reader
+    never sees half an artifact. Returns the version.
+    """
+    tokenizer = DistilBertTokenizerFast.from_pretrained(source)
+    model = DistilBertForSequenceClassification.from_pretrained(source, num_labels=2)
+    version = weights_fingerprint(model)
+    quantized = quantize(model)
+
+    path = os.path.join(model_dir, version)
+    tmp = path + ".building"
+    os.makedirs(tmp, exist_ok=True)
+    tokenizer.save_pretrained(tmp)
+    model.config.save_pretrained(tmp)
+    #the whole quantized module, so loading needs neither fp32 weights nor another quantize pass
+    torch.save(quantized, os.path.join(tmp, WEIGHTS_FILE))
+    if onnx:
+        export_onnx(model, os.path.join(tmp, ONNX_FILE))
+    with open(os.path.join(tmp, META_FILE), "w") as f:
+        json.dump({"version": version, "source": source, "onnx": onnx, **(meta or {})}, f)
+    if os.path.isdir(path):
+        shutil.rmtree(path)  #same weights built again
+    os.replace(tmp, path)
+    set_current_version(model_dir, version)
+    return version
+
+def _write_atomic(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)  #atomic, a reader never sees half a file
+
+def set_current_version(model_dir, version):
+    history = version_history(model_dir)
+    if history[-1:] != [version]:
+        _write_atomic(os.path.join(model_dir, HISTORY_FILE), "".join(v + "\n" for v in history + [version]))
+    _write_atomic(os.path.join(model_dir, CURRENT_FILE), version)
+
+def version_history(model_dir):
+    try:
+        with open(os.path.join(model_dir, HISTORY_FILE)) as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def rollback(model_dir, to=None):
+    """Make an earlier version current again: `to`, or the one before the current version.
+
+    Versions after the one rolled back to leave the history (their
+    directories stay), so rolling back twice goes two versions back.
+    """
+    history = version_history(model_dir)
+    if to is None:
+        if len(history) < 2:
+            raise RuntimeError("No earlier version to roll back to")
+        to = history[-2]
+    if not os.path.isdir(os.path.join(model_dir, to)):
+        raise RuntimeError(f"Version {to} is not in {model_dir}")
+    if to in history:
+        history = history[:len(history) - history[::-1].index(to)]
+    else:
+        history.append(to)
+    _write_atomic(os.path.join(model_dir, HISTORY_FILE), "".join(v + "\n" for v in history))
+    _write_atomic(os.path.join(model_dir, CURRENT_FILE), to)
+    return to
+
+def current_version(model_dir):
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_artifact(path, backend="torch", engine="auto", threads=0):
+    """Load a built version directory on `backend` ("torch" or "onnx"). Reads only local files and never re-quantizes."""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    tokenizer = DistilBertTokenizerFast.from_pretrained(path)
+    if backend == "onnx":
+        onnx_path = os.path.join(path, ONNX_FILE)
+        if not os.path.exists(onnx_path):
+            raise RuntimeError(f"{path} has no ONNX export, rebuild it with build_model.py --onnx")
+        return Classifier(tokenizer, OnnxBackend(onnx_path, threads), meta["version"])
+    if backend != "torch":
+        raise ValueError(f"Unknown classifier backend {backend!r}")
+    #the engine has to be set before loading, packed weights are rebuilt for it
+    torch.backends.quantized.engine = resolve_engine(engine)
+    #our own file, written by build_artifact; mmap lets tensors page in from disk instead of being copied
+    model = torch.load(os.path.join(path, WEIGHTS_FILE), mmap=True, weights_only=False)
+    return Classifier(tokenizer, TorchBackend(model, engine), meta["version"])
+
+def load_pretrained(source=MODEL_NAME, engine="auto"):
+    """The old start-up path: load fp32 weights and quantize them in process."""
+    tokenizer = DistilBertTokenizerFast.from_pretrained(source)
+    model = DistilBertForSequenceClassification.from_pretrained(source, num_labels=2)
+    version = weights_fingerprint(model)
+    return Classifier(tokenizer, TorchBackend(quantize(model, engine), engine), version)
+
+def load_classifier(model_dir, backend="torch", engine="auto", threads=0):
+    """The CURRENT artifact in `model_dir`, or the pretrained model if none has been built.
+
+    `threads` caps ONNX Runtime's intra-op threads (0 lets it choose); torch's
+    budget is process-wide, set with torch.set_num_threads by the caller.
+    """
+    version = current_version(model_dir)
+    if version:
+        return load_artifact(os.path.join(model_dir, version), backend, engine, threads)
+    if backend != "torch":
+        raise RuntimeError(f"No model artifact in {model_dir}; the {backend} backend needs build_model.py --onnx")
+    print(f"No model artifact in {model_dir}, loading {MODEL_NAME} and quantizing (run build_model.py)")
+    return load_pretrained(engine=engine)
+
+
+class HotSwapClassifier:
+    """Classifier whose reload() swaps in a newly published version between batches, never holding two models at once."""
+    def __init__(self, model_dir, backend="torch", engine="auto", threads=0):
+        self.model_dir = model_dir
+        self.backend, self.engine, self.threads = backend, engine, threads
+        self._lock = threading.Lock()
+        self._current = load_classifier(model_dir, backend, engine, threads)
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @property
+    def cache_version(self):
+        return self._current.cache_version
+
+    def classify_items(self, items, batch_size=32):
+        return self.classify_versioned(items, batch_size)[1]
+
+    def classify_versioned(self, items, batch_size=32):
+        #read under the lock, so a swap can't slip in between the batch and its version
+        with self._lock:
+            return self._current.classify_versioned(items, batch_size)
+
+    def classify_batch(self, tender_titles, keywords, batch_size=32):
+        prefix = prompt_prefix(keywords)
+        return self.classify_items([(prefix, title) for title in tender_titles], batch_size)
+
+    def classify_tender(self, tender_title, keywords):
+        return self.classify_batch([tender_title], keywords)[0]
+
+    def warm_up(self):
+        with self._lock:
+            self._current.warm_up()
+
+    def _load(self, version):
+        if version and os.path.isdir(os.path.join(self.model_dir, version)):
+            return load_artifact(os.path.join(self.model_dir, version), self.backend, self.engine, self.threads)
+        return load_pretrained(engine=self.engine)
+
+    def reload(self):
+        """Switch to the CURRENT version if it changed. Returns True if it switched."""
+        version = current_version(self.model_dir)
+        if not version or version == self.version:
+            return False
+        with self._lock:
+            previous = self._current.version
+            self._current = None
+            gc.collect()
+            try:
+                self._current = self._load(version)
+            except Exception:
+                self._current = self._load(previous)
+                raise
+            self._current.warm_up()
+        return True
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import hashlib, threading, time
+from dedup import normalize_title
+from db import fetchall_in
+
+
+def normalize_keywords(keywords):
+    return sorted({k.strip().lower() for k in keywords if k.strip()})
+
+def cache_key(title, keywords, model_version):
+    raw = "\n".join([model_version, normalize_title(title), *normalize_keywords(keywords)])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ClassificationCache:
+    """Classifier results for (title, keyword set), in an in-memory LRU over a SQLite table.
+
+    Keys include the model version, so results from other weights never
+    match; rows left by other versions are dropped when the cache is opened.
+    Callers whose model can be swapped at runtime pass the version they
+    read at the start of a request, so a lookup and its write use one key.
+    Lookups try memory first, then SQLite (promoting what they find), and
+    report a miss for anything the model still has to classify.
+    """
+    def __init__(self, database, model_version, max_memory=10000):
+        self.database = database
+        self.model_version = model_version
+        self.max_memory = max_memory
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "sqlite": 0}
+        self._misses = 0
+        database.execute("DELETE FROM classification_cache WHERE model_version != ?", (model_version,))
+
+    def _remember(self, key, result):
+        #caller holds the lock
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def get_many(self, titles, keywords, model_version=None):
+        """Cached (ai_prediction, ai_confidence) per title, None where the model has to run."""
+        model_version = model_version or self.model_version
+        keys = [cache_key(t, keywords, model_version) for t in titles]
+        results = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self._hits["memory"] += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+        if not missing:
+            return results
+
+        with self.database.connection() as conn:
+            rows = fetchall_in(
+                conn, "SELECT key, ai_prediction, ai_confidence FROM classification_cache WHERE key IN ({})", missing
+            )
+        found = {key: (bool(pred), float(conf)) for key, pred, conf in rows}
+
+        with self._lock:
+            for key, positions in missing.items():
+                if key in found:
+                    self._remember(key, found[key])
+                    self._hits["sqlite"] += len(positions)
+                    for i in positions:
+                        results[i] = found[key]
+                else:
+                    self._misses += len(positions)
+        return results
+
+    def put_many(self, titles, keywords, results, model_version=None):
+        model_version = model_version or self.model_version
+        rows = []
+        with self._lock:
+            for title, result in zip(titles, results):
+                key = cache_key(title, keywords, model_version)
+                self._remember(key, result)
+                rows.append((key, model_version, result[0], result[1], time.time()))
+        self.database.executemany("""
+            INSERT OR REPLACE INTO classification_cache (key, model_version, ai_prediction, ai_confidence, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+
+    def stats(self):
+        with self._lock:
+            hits = self._hits["memory"] + self._hits["sqlite"]
+            lookups = hits + self._misses
+            return {
+                "model_version": self.model_version,
+                "memory_entries": len(self._memory),
+                "memory_hits": self._hits["memory"],
+                "sqlite_hits": self._hits["sqlite"],
+                "misses": self._misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,107 @@
+import hashlib, json, time
+
+
+def crawl_job_id(username, keywords):
+    """Stable id for a scrape, so retrying the same keyword set resumes the same crawl."""
+    raw = username + "\n" + "\n".join(sorted(k.strip().lower() for k in keywords))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def discard_crawl(database, job_id):
+    """Delete every checkpoint of a crawl."""
+    with database.connection() as conn:
+        for table in ("crawl_pages", "crawl_tabs", "crawl_tenders", "crawl_skipped", "crawl_runs"):
+            conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+
+class CrawlState:
+    """Per-tender and per-page checkpoints of a crawl, so a retry with the same job id scrapes only unfinished pages.
+
+    Checkpoints older than `max_age` seconds are discarded on open, since OPEN and PENDING AWARD tenders change.
+    """
+    def __init__(self, database, job_id, max_age=None):
+        self.database = database
+        self.job_id = job_id
+        self.started_at = self._start(max_age)
+
+    def _start(self, max_age):
+        row = self.database.fetchone("SELECT started_at FROM crawl_runs WHERE job_id = ?", (self.job_id,))
+        if row and max_age is not None and time.time() - row[0] > max_age:
+            print(f"Discarding crawl checkpoint {self.job_id}, started {time.time() - row[0]:.0f}s ago")
+            self.clear()
+            row = None
+        if row:
+            return row[0]
+        started_at = time.time()
+        self._write("INSERT OR IGNORE INTO crawl_runs (job_id, started_at) VALUES (?, ?)", (self.job_id, started_at))
+        return started_at
+
+    def _write(self, sql, params=()):
+        self.database.execute(sql, params)
+
+    def _read(self, sql, params=()):
+        return self.database.fetchall(sql, params)
+
+    def save_tender(self, keyword, tab, page, record):
+        with self.database.connection() as conn:
+            conn.execute(
+                "INSERT INTO crawl_tenders (job_id, keyword, tab, page, record) VALUES (?, ?, ?, ?, ?)",
+                (self.job_id, keyword, tab, page, json.dumps(record)),
+            )
+            conn.execute(
+                "DELETE FROM crawl_skipped WHERE job_id = ? AND keyword = ? AND tab = ? AND title = ?",
+                (self.job_id, keyword, tab, record.get("Title")),
+            )
+
+    def skip_tender(self, keyword, tab, page, title, error):
+        self._write(
+            "INSERT OR REPLACE INTO crawl_skipped (job_id, keyword, tab, title, page, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.job_id, keyword, tab, title, page, error),
+        )
+
+    def skipped(self, keyword, tab):
+        """(title, page, error) of the tab's tenders that failed and haven't been scraped since."""
+        return self._read(
+            "SELECT title, page, error FROM crawl_skipped WHERE job_id = ? AND keyword = ? AND tab = ? ORDER BY page",
+            (self.job_id, keyword, tab),
+        )
+
+    def finish_page(self, keyword, tab, page):
+        self._write(
+            "INSERT OR IGNORE INTO crawl_pages (job_id, keyword, tab, page) VALUES (?, ?, ?, ?)",
+            (self.job_id, keyword, tab, page),
+        )
+
+    def finish_tab(self, keyword, tab):
+        self._write(
+            "INSERT OR IGNORE INTO crawl_tabs (job_id, keyword, tab) VALUES (?, ?, ?)",
+            (self.job_id, keyword, tab),
+        )
+
+    def finished_pages(self, keyword, tab):
+        return {page for (page,) in self._read(
+            "SELECT page FROM crawl_pages WHERE job_id = ? AND keyword = ? AND tab = ?",
+            (self.job_id, keyword, tab),
+        )}
+
+    def is_tab_done(self, keyword, tab):
+        return bool(self._read(
+            "SELECT 1 FROM crawl_tabs WHERE job_id = ? AND keyword = ? AND tab = ?",
+            (self.job_id, keyword, tab),
+        ))
+
+    def tenders(self, keyword, tab):
+        rows = self._read(
+            "SELECT record FROM crawl_tenders WHERE job_id = ? AND keyword = ? AND tab = ? ORDER BY id",
+            (self.job_id, keyword, tab),
+        )
+        #JSON turns the (respondent, amount) tuples into lists; put them back
+        records = []
+        for (raw,) in rows:
+            record = json.loads(raw)
+            if isinstance(record.get("Respondents"), list):
+                record["Respondents"] = [tuple(r) for r in record["Respondents"]]
+            records.append(record)
+        return records
+
+    def clear(self):
+        discard_crawl(self.database, self.job_id)
@@ -0,0 +1,122 @@
+import asyncio, queue, sqlite3, threading
+from contextlib import contextmanager
+
+
+#applied to every pooled connection; WAL lets readers run alongside a writer
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  #durable at checkpoints, safe against corruption under WAL
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  #16 MB page cache per connection
+)
+
+def fetchall_in(conn, sql, values, chunk_size=500):
+    """Rows of `sql` for every value, its `IN ({})` filled and run in chunks under SQLite's bound-parameter limit."""
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        rows.extend(conn.execute(sql.format(", ".join("?" * len(chunk))), chunk).fetchall())
+    return rows
+
+
+class Database:
+    """Pool of up to `size` long-lived connections to one SQLite file, each keeping its page and statement caches."""
+    def __init__(self, path, size=8, statement_cache=128):
+        self.path = path
+        self.size = size
+        self.statement_cache = statement_cache
+        self._idle = queue.LifoQueue()  #most recently used first, its pages are the warmest
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                               cached_statements=self.statement_cache)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            open_new = self._opened < self.size
+            if open_new:
+                self._opened += 1
+        if not open_new:
+            return self._idle.get()
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits when the block succeeds, rolls back when it raises."""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def execute(self, sql, params=()):
+        """Run one statement; returns the last inserted row id."""
+        with self.connection() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    def executemany(self, sql, rows):
+        with self.connection() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def fetchone(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def migrate(self, migrations):
+        """Apply, in one transaction, the versions of `migrations` this file hasn't had (per PRAGMA user_version).
+
+        Each version is a list of SQL statements or functions of the connection; returns the new version.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(migrations[version:], start=version + 1):
+                for sql in statements:
+                    sql(conn) if callable(sql) else conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {number}")
+            if version < len(migrations):
+                print(f"Migrated {self.path} from schema version {version} to {len(migrations)}")
+            return max(version, len(migrations))
+
+    async def run(self, fn, *args):
+        """Call `fn(*args)` in a worker thread; for helpers that use this database."""
+        return await asyncio.to_thread(fn, *args)
+
+    async def aexecute(self, sql, params=()):
+        return await self.run(self.execute, sql, params)
+
+    async def afetchone(self, sql, params=()):
+        return await self.run(self.fetchone, sql, params)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
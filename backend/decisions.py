@@ -0,0 +1,67 @@
+from classify_cache import normalize_keywords
+from dedup import tender_key, record_keys
+from db import fetchall_in
+
+
+#tenders columns a saved decision writes, in insert order
+DECISION_COLUMNS = ("title", "tender_number", "agency", "ref_number", "awarded", "awardee", "respondents",
+                    "num_of_respondents", "keywords", "ai_prediction", "ai_confidence", "user_decision")
+
+def decision_key(tender_number, title, keywords):
+    """A saved decision is one tender under one keyword set, whatever the keyword order or case."""
+    if isinstance(keywords, str):
+        keywords = keywords.split("|")
+    return tender_key(tender_number, title), "|".join(normalize_keywords(keywords))
+
+def decision_row(decision):
+    #tenders row values for a decision dict, booleans as SQLite stores them
+    row = dict(decision, keywords="|".join(decision["keywords"]))
+    for column in ("ai_prediction", "user_decision"):
+        if row[column] is not None:
+            row[column] = int(bool(row[column]))
+    return tuple(row[column] for column in DECISION_COLUMNS)
+
+def upsert_decisions(database, decisions):
+    """Write decisions to the tenders table in one transaction, matched by tender and keyword set.
+
+    New tenders are inserted, ones whose saved row differs are updated in
+    place and identical ones are left alone; later duplicates in the payload
+    win. Their keys go into tender_index in the same transaction, so later
+    scrapes skip them. Returns the number of rows inserted, updated and unchanged.
+    """
+    latest = {}
+    for decision in decisions:
+        latest[decision_key(decision["tender_number"], decision["title"], decision["keywords"])] = decision_row(decision)
+    tender_keys = sorted({key[0] for key in latest})
+
+    columns = ", ".join(DECISION_COLUMNS)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    with database.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")  #nobody writes between reading the saved rows and writing ours
+        saved = {}
+        for row_id, *row in fetchall_in(
+            conn, f"SELECT id, {columns} FROM tenders WHERE tender_key IN ({{}}) ORDER BY id", tender_keys
+        ):
+            saved.setdefault(decision_key(row[1], row[0], row[8]), (row_id, tuple(row)))
+
+        inserts, updates = [], []
+        for key, row in latest.items():
+            if key not in saved:
+                inserts.append((*row, key[0]))
+            elif saved[key][1] != row:
+                updates.append((*row, key[0], saved[key][0]))
+            else:
+                counts["unchanged"] += 1
+        conn.executemany(
+            f"INSERT INTO tenders ({columns}, tender_key) VALUES ({', '.join('?' * (len(DECISION_COLUMNS) + 1))})", inserts
+        )
+        conn.executemany(
+            f"UPDATE tenders SET {', '.join(f'{c} = ?' for c in DECISION_COLUMNS)}, tender_key = ?, "
+            f"timestamp = CURRENT_TIMESTAMP WHERE id = ?", updates
+        )
+        keys = set()
+        for row in latest.values():
+            keys.update(record_keys({"Title": row[0], "Tender Number": row[1]}))
+        conn.executemany("INSERT OR IGNORE INTO tender_index (key) VALUES (?)", [(k,) for k in keys])
+    counts["inserted"], counts["updated"] = len(inserts), len(updates)
+    return counts
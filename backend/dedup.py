@@ -0,0 +1,72 @@
+import re, threading
+
+
+def normalize_title(title):
+    return re.sub(r"\s+", " ", (title or "")).strip().lower()
+
+def tender_key(tender_number=None, title=None):
+    """Identity of a tender: its Tender/Quotation number, or the normalized title if it has none."""
+    number = (tender_number or "").strip().upper()
+    if number and number != "N/A":
+        return f"no:{number}"
+    return f"title:{normalize_title(title)}"
+
+def record_keys(record):
+    #titles repeat across years and agencies, so a numbered tender is only known by its number
+    return {tender_key(record.get("Tender Number"), record.get("Title"))}
+
+
+class TenderIndex:
+    """Set of known tender keys, shared by all scraper threads of a run.
+
+    `known` keys come from SQLite (tenders saved in earlier runs) and from
+    records kept during the run; listing rows claimed while their tender is
+    being opened are held apart, so the same tender found under two keywords
+    or tabs is only opened once. Every lookup is a set membership test
+    instead of a scan over past results.
+    """
+    def __init__(self, keys=()):
+        self._keys = set(keys)
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def claim_listing(self, title, number=None):
+        """Reserve a listing row, by the tender number it shows, before opening it. False if it is already known or taken."""
+        key = tender_key(number, title)
+        with self._lock:
+            if key in self._keys or key in self._claimed:
+                return False
+            self._claimed.add(key)
+            return True
+
+    def release_listing(self, title, number=None):
+        """Give back a claimed listing row whose tender could not be scraped."""
+        with self._lock:
+            self._claimed.discard(tender_key(number, title))
+
+    def claim(self, record):
+        """Reserve a scraped record by tender number. False if that tender was already seen."""
+        key = tender_key(record.get("Tender Number"), record.get("Title"))
+        with self._lock:
+            if key.startswith("no:") and key in self._keys:
+                return False
+            self._keys.update(record_keys(record))
+            return True
+
+
+def load_tender_index(database):
+    """Load the persisted index from the tenders Database, seeding it from the tenders table the first time."""
+    with database.connection() as conn:
+        keys = {row[0] for row in conn.execute("SELECT key FROM tender_index")}
+        if not keys:
+            rows = conn.execute("SELECT title, tender_number FROM tenders").fetchall()
+            for title, number in rows:
+                keys.update(record_keys({"Title": title, "Tender Number": number}))
+            conn.executemany("INSERT OR IGNORE INTO tender_index (key) VALUES (?)", [(k,) for k in keys])
+    return TenderIndex(keys)
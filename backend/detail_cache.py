@@ -0,0 +1,56 @@
+import json, time
+
+
+def freshness_policy(pending_ttl):
+    """Seconds a cached record stays valid, by tender status. None means forever; missing means never cached."""
+    return {
+        "AWARDED": None,            #final, never changes again
+        "NO AWARD": None,
+        "PENDING AWARD": pending_ttl,
+    }
+
+
+class DetailCache:
+    """Parsed tender details in SQLite, keyed by tender number.
+
+    Lookups happen before a detail page is opened, so they go by the listing
+    link; titles repeat across years and agencies, so they are never used. Final
+    statuses are kept forever, PENDING AWARD for `pending_ttl` seconds, and
+    OPEN tenders are never cached so they are refreshed on every run.
+    """
+    def __init__(self, database, pending_ttl=6 * 3600):
+        self.database = database
+        self.policy = freshness_policy(pending_ttl)
+
+    def _is_fresh(self, status, fetched_at):
+        if status not in self.policy:
+            return False
+        ttl = self.policy[status]
+        return ttl is None or time.time() - fetched_at < ttl
+
+    def get(self, title, link=None):
+        """Cached record for a listing entry, or None if there is no fresh one."""
+        if not link:
+            return None
+        row = self.database.fetchone(
+            "SELECT status, record, fetched_at FROM tender_cache WHERE link = ?", (link,)
+        )
+        if row is None:
+            return None
+        status, raw, fetched_at = row
+        if not self._is_fresh(status, fetched_at):
+            return None
+        record = json.loads(raw)
+        if isinstance(record.get("Respondents"), list):
+            record["Respondents"] = [tuple(r) for r in record["Respondents"]]
+        record["Title"] = title
+        return record
+
+    def put(self, record, link=None):
+        number = (record.get("Tender Number") or "").strip()
+        if not number or record.get("Awarded") not in self.policy:
+            return
+        self.database.execute("""
+            INSERT OR REPLACE INTO tender_cache (tender_number, link, status, record, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (number, link, record["Awarded"], json.dumps(record), time.time()))
@@ -0,0 +1,142 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.chrome.options import Options
+from concurrent.futures import ThreadPoolExecutor
+import functools, queue, threading, weakref
+
+
+#resource types GeBiz pages don't need for scraping; stylesheets stay so visibility checks still work
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*",
+]
+
+@functools.lru_cache(maxsize=None)
+def driver_path(): #resolves (and downloads if needed) chromedriver once per process
+    return ChromeDriverManager().install()
+
+def init_driver(headless=True, block_resources=True): #this function helps to initialize the Chrome driver
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    if block_resources:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+
+    driver = webdriver.Chrome(service=Service(driver_path()), options=options)
+    if block_resources:
+        #fonts, media and trackers have no Chrome pref, so block them at the network layer
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+_page_counts = weakref.WeakKeyDictionary()
+
+def count_page(driver): #called by the scraper for every page a session loads
+    _page_counts[driver] = _page_counts.get(driver, 0) + 1
+
+def pages_loaded(driver):
+    return _page_counts.get(driver, 0)
+
+def is_healthy(driver):
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """Pool of long-lived Chrome sessions shared by scrape tasks.
+
+    Sessions are created lazily up to `size` (or up front with warm()), handed
+    out by acquire() and returned with release(). A session that fails its
+    health check, is reported broken, or has loaded `max_pages` pages is quit
+    and replaced by a fresh one, which keeps Chrome's memory from creeping.
+    """
+    def __init__(self, size, max_pages=300, headless=True, block_resources=True):
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.block_resources = block_resources
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+
+    def _new_driver(self):
+        return init_driver(headless=self.headless, block_resources=self.block_resources)
+
+    def warm(self, count=None):
+        """Start sessions ahead of time so the first scrape doesn't pay for Chrome startup."""
+        count = self.size if count is None else min(count, self.size)
+        with self._lock:
+            count = max(0, count - self._live)
+            self._live += count
+        def start():
+            try:
+                self._idle.put(self._new_driver())
+            except Exception as e:
+                print(f"Failed to start Chrome: {e}")
+                with self._lock:
+                    self._live -= 1
+        with ThreadPoolExecutor(max_workers=max(1, count)) as pool:
+            for _ in range(count):
+                pool.submit(start)
+
+    def acquire(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_start = self._live < self.size
+                    if can_start:
+                        self._live += 1
+                if can_start:
+                    try:
+                        return self._new_driver()
+                    except Exception:
+                        with self._lock:
+                            self._live -= 1
+                        raise
+                try:
+                    #re-check now and then, a retired session frees a slot without filling the queue
+                    driver = self._idle.get(timeout=1)
+                except queue.Empty:
+                    continue
+            if is_healthy(driver):
+                return driver
+            self._retire(driver)
+
+    def release(self, driver, broken=False):
+        if self._closed or broken or pages_loaded(driver) >= self.max_pages:
+            self._retire(driver)
+        else:
+            self._idle.put(driver)
+
+    def _retire(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._live -= 1
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._retire(self._idle.get_nowait())
+            except queue.Empty:
+                break
@@ -0,0 +1,190 @@
+import os, pickle, queue, struct, subprocess, sys, threading, time
+from classifier import current_version, prompt_prefix
+
+
+#each message on a worker's stdin/stdout is a 4-byte length followed by a pickle
+_HEADER = struct.Struct("!I")
+
+def _send(stream, message):
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+def _receive(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise EOFError("inference worker closed its pipe")
+    return pickle.loads(stream.read(_HEADER.unpack(header)[0]))
+
+
+class _Worker:
+    def __init__(self, model_dir, backend, engine, threads):
+        self.info = None  #(version, cache_version) it loaded, once ready
+        env = {
+            **os.environ,
+            #read by torch/OpenMP/MKL at import, so they have to be set before the worker starts
+            "OMP_NUM_THREADS": str(threads),
+            "MKL_NUM_THREADS": str(threads),
+            "TOKENIZERS_PARALLELISM": "false",
+        }
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), model_dir, backend, engine, str(threads)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+        )
+
+    def wait_ready(self):
+        status, payload = _receive(self.proc.stdout)
+        if status != "ready":
+            raise RuntimeError(f"Inference worker failed to start: {payload}")
+        self.info = payload
+        return payload
+
+    def call(self, items, batch_size):
+        if self.proc.stdin.closed or self.proc.poll() is not None:
+            raise EOFError("inference worker has exited")
+        _send(self.proc.stdin, (items, batch_size))
+        status, payload = _receive(self.proc.stdout)
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def close(self):
+        try:
+            self.proc.stdin.close()  #the worker exits when its stdin closes
+            self.proc.wait(timeout=10)
+        except Exception:
+            self.proc.kill()
+
+
+class InferencePool:
+    """Classifier in `workers` separate processes of `threads` torch threads each, so inference stays off the API's GIL.
+
+    Offers the same classify methods as Classifier; reload() replaces the workers one at a time.
+    """
+    def __init__(self, model_dir, backend="torch", engine="auto", workers=2, threads=1):
+        self.spec = (model_dir, backend, engine, threads)
+        self._idle = queue.Queue()
+        self._all = [_Worker(*self.spec) for _ in range(workers)]
+        try:
+            infos = [w.wait_ready() for w in self._all]  #the workers load in parallel
+        except Exception:
+            for w in self._all:
+                w.close()
+            raise
+        self.version, self.cache_version = infos[0]
+        for w in self._all:
+            self._idle.put(w)
+        self._lock = threading.Lock()
+
+    def _start_replacement(self, worker):
+        #swaps a started worker in for `worker` in the pool's list; the caller returns it to the idle queue
+        replacement = _Worker(*self.spec)
+        try:
+            info = replacement.wait_ready()
+        except Exception:
+            replacement.close()
+            raise
+        with self._lock:
+            self._all = [replacement if w is worker else w for w in self._all]
+        return replacement, info
+
+    def classify_versioned(self, items, batch_size=32):
+        """(cache_version, results) of one batch, the version being that of the worker that ran it."""
+        worker = self._idle.get()
+        try:
+            return worker.call(items, batch_size)
+        except (EOFError, BrokenPipeError, OSError):
+            #the process is gone; a worker that answered with an error is still fine and goes back as it is
+            worker.close()
+            worker, _ = self._start_replacement(worker)  #if this fails the dead worker goes back, the next call retries
+            raise RuntimeError("Inference worker died and was restarted")
+        finally:
+            self._idle.put(worker)
+
+    def classify_items(self, items, batch_size=32):
+        return self.classify_versioned(items, batch_size)[1]
+
+    def reload(self, timeout=300):
+        """Rolling restart onto the CURRENT version if it changed. Returns True if it switched."""
+        version = current_version(self.spec[0])
+        if not version or version == self.version:
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                #the pool only reports the new version once no worker serves the old one
+                if all(w.info[0] == version for w in self._all):
+                    self.version, self.cache_version = self._all[0].info
+                    return True
+            remaining = deadline - time.monotonic()
+            try:
+                worker = self._idle.get(timeout=max(0.0, min(remaining, 1.0)))  #waits for a worker to finish its batch
+            except queue.Empty:
+                if remaining <= 0:
+                    raise TimeoutError(f"Inference workers not all restarted onto {version} after {timeout}s")
+                continue
+            if worker.info[0] == version:
+                self._idle.put(worker)  #already restarted, wait for one of the others
+                time.sleep(0.01)
+                continue
+            #start the replacement before stopping the old worker, so a broken version leaves the pool as it was
+            try:
+                replacement, info = self._start_replacement(worker)
+            except Exception:
+                self._idle.put(worker)
+                raise
+            worker.close()
+            self._idle.put(replacement)
+            if info[0] != version:
+                raise RuntimeError(f"CURRENT changed from {version} to {info[0]} during the restart")
+
+    def classify_batch(self, tender_titles, keywords, batch_size=32):
+        prefix = prompt_prefix(keywords)
+        return self.classify_items([(prefix, title) for title in tender_titles], batch_size)
+
+    def classify_tender(self, tender_title, keywords):
+        return self.classify_batch([tender_title], keywords)[0]
+
+    def warm_up(self):
+        #one call per worker, each takes a different idle worker
+        threads = [threading.Thread(target=self.classify_batch, args=(["warm up"], ["warm up"]))
+                   for _ in self._all]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def close(self):
+        with self._lock:
+            for w in self._all:
+                w.close()
+
+
+def serve(model_dir, backend, engine, threads):
+    import torch
+    from classifier import load_classifier
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr  #anything printed by libraries must not end up in the pipe
+    try:
+        classifier = load_classifier(model_dir, backend, engine, threads=threads)
+    except Exception as e:
+        _send(out, ("error", str(e)))
+        return
+    _send(out, ("ready", (classifier.version, classifier.cache_version)))
+    while True:
+        try:
+            items, batch_size = _receive(sys.stdin.buffer)
+        except EOFError:
+            return
+        try:
+            _send(out, ("ok", classifier.classify_versioned(items, batch_size)))
+        except Exception as e:
+            _send(out, ("error", str(e)))
+
+
+if __name__ == "__main__":
+    model_dir, backend, engine, threads = sys.argv[1:5]
+    serve(model_dir, backend, engine, int(threads))
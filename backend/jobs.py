@@ -0,0 +1,268 @@
+import json, os, signal, subprocess, sys, threading, time, uuid
+from datetime import datetime
+from db import Database
+from crawl_state import CrawlState, discard_crawl
+
+
+def _row_dict(cursor):
+    row = cursor.fetchone()
+    return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+def submit_job(database, username, keywords):
+    job_id = uuid.uuid4().hex
+    database.execute(
+        "INSERT INTO jobs (id, username, keywords, status) VALUES (?, ?, ?, 'queued')",
+        (job_id, username, json.dumps(keywords)),
+    )
+    return job_id
+
+def get_job(database, job_id):
+    with database.connection() as conn:
+        job = _row_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)))
+    if not job:
+        return None
+    job["keywords"] = json.loads(job["keywords"])
+    job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+    job["timings"] = json.loads(job["timings"]) if job["timings"] else None
+    return job
+
+def get_job_results(database, job_id, offset=0):
+    rows = database.fetchall(
+        "SELECT record FROM job_results WHERE job_id = ? ORDER BY id LIMIT -1 OFFSET ?",
+        (job_id, offset),
+    )
+    return [json.loads(record) for (record,) in rows]
+
+def request_cancel(database, job_id):
+    """Cancel a job; True if it was still queued and stopped at once. Running ones are asked to stop and the runner enforces it."""
+    now = datetime.utcnow()
+    with database.connection() as conn:
+        cancelled = conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (now, job_id),
+        ).rowcount == 1
+        conn.execute(
+            "UPDATE jobs SET cancel_requested_at = ? WHERE id = ? AND status = 'running' AND cancel_requested_at IS NULL",
+            (now, job_id),
+        )
+    return cancelled
+
+def requeue_job(database, job_id):
+    """Queue a failed job again; it keeps its id, so it resumes from its crawl state."""
+    database.execute(
+        "UPDATE jobs SET status = 'queued', error = NULL, cancel_requested_at = NULL, started_at = NULL, "
+        "finished_at = NULL WHERE id = ? AND status = 'failed'",
+        (job_id,),
+    )
+
+def _update_job(database, job_id, **fields):
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    database.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+
+def claim_job(database):
+    """Mark the oldest queued job running in this process; (job_id, keywords), or None if there is none to take."""
+    with database.connection() as conn:
+        row = conn.execute(
+            "SELECT id, keywords FROM jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        #another worker (or a cancel) may have taken it since the SELECT
+        claimed = conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, worker = ? WHERE id = ? AND status = 'queued'",
+            (datetime.utcnow(), os.getpid(), row[0]),
+        ).rowcount == 1
+    return (row[0], json.loads(row[1])) if claimed else None
+
+
+class JobWorker:
+    """A worker process that runs queued jobs one after another on a Chrome pool kept warm between them."""
+    def __init__(self, db_path, settings):
+        from drivers import DriverPool
+        from detail_cache import DetailCache
+
+        self.settings = settings
+        self.database = Database(db_path, size=2)
+        self.crawl_state_db = Database(settings["crawl_state_db"])
+        self.tenders_db = Database(settings["tenders_db"], size=1)
+        self.detail_cache_db = Database(settings["detail_cache_db"])
+        self.cache = DetailCache(self.detail_cache_db, pending_ttl=settings["pending_award_ttl"])
+        self.pool = DriverPool(
+            settings["pool_size"],
+            max_pages=settings["max_pages"],
+            headless=settings["headless"],
+            block_resources=settings["block_resources"],
+        )
+        self.stopping = threading.Event()
+
+    def serve(self):
+        parent = os.getppid()
+        try:
+            self.pool.warm()
+            #stop with the API too, should it die without stopping its runner
+            while not self.stopping.is_set() and os.getppid() == parent:
+                job = claim_job(self.database)
+                if job is None:
+                    self.stopping.wait(self.settings["poll_interval"])
+                else:
+                    self.run_job(*job)
+        finally:
+            self.pool.close()
+            for database in (self.database, self.crawl_state_db, self.tenders_db, self.detail_cache_db):
+                database.close()
+
+    def run_job(self, job_id, keywords):
+        """Scrape one job and record everything in the jobs db."""
+        from scraper import scrape_keywords, format_result, ScrapeIncomplete, ScrapeRun
+        from dedup import load_tender_index
+        from metrics import ScrapeMetrics
+
+        database = self.database
+        cancel = threading.Event()
+        requested = threading.Event()
+        def watch_for_cancel():
+            while not cancel.is_set():
+                job = get_job(database, job_id)
+                if job is None or job["cancel_requested_at"]:
+                    requested.set()
+                if requested.is_set() or self.stopping.is_set():
+                    cancel.set()
+                time.sleep(1)
+        threading.Thread(target=watch_for_cancel, daemon=True).start()
+
+        lock = threading.Lock()
+        def on_event(event):
+            with lock, database.connection() as conn:
+                if event["event"] == "tender":
+                    conn.execute(
+                        "INSERT INTO job_results (job_id, record) VALUES (?, ?)",
+                        (job_id, json.dumps(format_result(event["result"]))),
+                    )
+                    conn.execute("UPDATE jobs SET result_count = result_count + 1 WHERE id = ?", (job_id,))
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET progress = ? WHERE id = ?",
+                        (json.dumps({k: event[k] for k in ("keyword", "tab", "page")}), job_id),
+                    )
+
+        #the crawl state is keyed on the job id, so a job requeued after a restart resumes its crawl
+        state = CrawlState(self.crawl_state_db, job_id, max_age=self.settings.get("crawl_state_max_age"))
+        metrics = ScrapeMetrics()
+        try:
+            run = ScrapeRun(
+                index=load_tender_index(self.tenders_db),
+                fast_path=self.settings["fast_path"],
+                state=state,
+                on_event=on_event,
+                cancel=cancel,
+                metrics=metrics,
+                cache=self.cache,
+            )
+            scrape_keywords(keywords, run, pool=self.pool, pool_size=self.settings["pool_size"])
+            if cancel.is_set() and not requested.is_set():
+                return  #the worker is stopping; the job stays running and is requeued when the runner starts again
+            #a cancelled job can't be retried, so its checkpoints go too
+            state.clear()
+            _update_job(database, job_id, status="cancelled" if cancel.is_set() else "done", finished_at=datetime.utcnow())
+        except ScrapeIncomplete as e:
+            #the crawl state is kept, so a requeue only redoes the failed tabs
+            attempts = metrics.summary()["counters"].get("task_failures", 0)
+            _update_job(database, job_id, status="failed", error=f"{e} ({attempts} failed attempts)",
+                        finished_at=datetime.utcnow())
+        except Exception as e:
+            _update_job(database, job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            cancel.set()
+            _update_job(database, job_id, timings=json.dumps(metrics.summary()))
+
+
+class JobRunner:
+    """Keeps `max_concurrent` job worker processes running and enforces cancels.
+
+    Runs as a thread in the API process that only polls SQLite, so scrapes
+    never hold an API threadpool worker. Jobs that were running when the API
+    last stopped are put back in the queue.
+    """
+    def __init__(self, database, crawl_state_db, settings, max_concurrent=2, poll_interval=1.0, cancel_grace=30):
+        self.database = database
+        self.crawl_state_db = crawl_state_db
+        self.settings = settings
+        self.max_concurrent = max_concurrent
+        self.poll_interval = poll_interval
+        self.cancel_grace = cancel_grace
+        self._workers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.database.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        #running jobs go back to the queue on next start and resume from their crawl state
+        for proc in self._workers:
+            proc.terminate()
+        for proc in self._workers:
+            self._reap(proc)
+        self._workers = []
+
+    def _reap(self, proc):
+        """Wait for a worker told to stop, killing it if it takes longer than the cancel grace."""
+        try:
+            proc.wait(timeout=self.cancel_grace)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"Job runner error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def _tick(self):
+        for proc in list(self._workers):
+            if proc.poll() is not None:
+                self._workers.remove(proc)
+                print(f"Job worker {proc.pid} exited with code {proc.returncode}")
+                with self.database.connection() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE status = 'running' AND worker = ?",
+                        (f"worker exited with code {proc.returncode}", datetime.utcnow(), proc.pid),
+                    )
+
+        cancelling = self.database.fetchall(
+            "SELECT id, worker, cancel_requested_at FROM jobs WHERE status = 'running' AND cancel_requested_at IS NOT NULL"
+        )
+        for job_id, pid, requested in cancelling:
+            if (datetime.utcnow() - datetime.fromisoformat(str(requested))).total_seconds() <= self.cancel_grace:
+                continue
+            #the worker didn't stop the job by itself in time
+            for proc in [p for p in self._workers if p.pid == pid]:
+                proc.terminate()
+                self._reap(proc)
+                self._workers.remove(proc)
+            discard_crawl(self.crawl_state_db, job_id)
+            _update_job(self.database, job_id, status="cancelled", finished_at=datetime.utcnow())
+
+        while len(self._workers) < self.max_concurrent:
+            #a fresh interpreter running this file, so the worker never imports the API (or its model)
+            self._workers.append(subprocess.Popen([
+                sys.executable, os.path.abspath(__file__),
+                self.database.path, json.dumps({**self.settings, "poll_interval": self.poll_interval}),
+            ]))
+
+
+if __name__ == "__main__":
+    db_path, settings = sys.argv[1:3]
+    worker = JobWorker(db_path, json.loads(settings))
+    #the runner stops workers with SIGTERM; finish the current tender and quit Chrome on the way out
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stopping.set())
+    worker.serve()
@@ -0,0 +1,119 @@
+import asyncio, time
+import httpx
+
+
+class MetabaseError(Exception):
+    """A Metabase call failed; `status_code` is what the API should answer with."""
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MetabaseClient:
+    """Metabase API access over one pooled httpx.AsyncClient, reusing its session until `session_ttl` or a 401.
+
+    Embeddable lists are cached for `list_ttl` seconds, then served stale for up to `max_stale` while refreshed.
+    """
+    def __init__(self, site_url, username, password, session_ttl=13 * 24 * 3600, list_ttl=60, max_stale=600,
+                 timeout=10, max_connections=20):
+        self.site_url = site_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.session_ttl = session_ttl
+        self.list_ttl = list_ttl
+        self.max_stale = max_stale
+        self._http = httpx.AsyncClient(
+            base_url=self.site_url, timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._session = None  #(token, obtained at)
+        self._login_lock = asyncio.Lock()
+        self._lists = {}  #path -> (embeddable items, fetched at)
+        self._fetches = {}  #path -> in-flight fetch task
+        self._stats = {"logins": 0, "fetches": 0, "fresh_hits": 0, "stale_hits": 0, "misses": 0, "reauths": 0}
+
+    async def _login(self, expired=None):
+        async with self._login_lock:
+            #someone else may have logged in while we waited
+            if self._session and self._session[0] != expired and time.monotonic() - self._session[1] < self.session_ttl:
+                return self._session[0]
+            try:
+                resp = await self._http.post("/api/session", json={"username": self.username, "password": self.password})
+            except httpx.HTTPError as e:
+                raise MetabaseError(502, f"Metabase unreachable: {e}")
+            if resp.status_code != 200:
+                raise MetabaseError(502, "Failed to authenticate with Metabase")
+            self._session = (resp.json()["id"], time.monotonic())
+            self._stats["logins"] += 1
+            return self._session[0]
+
+    async def get(self, path):
+        """GET an API path with the cached session, logging in again once if Metabase rejects it."""
+        session = self._session
+        if session is None or time.monotonic() - session[1] >= self.session_ttl:
+            token = await self._login()
+        else:
+            token = session[0]
+        for attempt in range(2):
+            try:
+                resp = await self._http.get(path, headers={"X-Metabase-Session": token})
+            except httpx.HTTPError as e:
+                raise MetabaseError(502, f"Metabase unreachable: {e}")
+            if resp.status_code == 401 and attempt == 0:
+                self._stats["reauths"] += 1
+                token = await self._login(expired=token)
+                continue
+            if resp.status_code != 200:
+                raise MetabaseError(resp.status_code, f"Metabase returned {resp.status_code} for {path}")
+            return resp.json()
+
+    async def _fetch_embeddable(self, path):
+        items = [{"id": item["id"], "name": item["name"]}
+                 for item in await self.get(path) if item.get("enable_embedding") is True]
+        self._lists[path] = (items, time.monotonic())
+        self._stats["fetches"] += 1
+        return items
+
+    def _refresh(self, path):
+        task = self._fetches.get(path)
+        if task is None:
+            task = asyncio.create_task(self._fetch_embeddable(path))
+            self._fetches[path] = task
+            task.add_done_callback(lambda t: self._refreshed(path, t))
+        return task
+
+    def _refreshed(self, path, task):
+        self._fetches.pop(path, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Metabase refresh of {path} failed: {task.exception()}")
+
+    async def embeddable(self, path):
+        """Items at a list endpoint with embedding enabled, as {id, name}."""
+        cached = self._lists.get(path)
+        age = time.monotonic() - cached[1] if cached else None
+        if cached and age < self.list_ttl:
+            self._stats["fresh_hits"] += 1
+            return cached[0]
+        if cached and age < self.list_ttl + self.max_stale:
+            self._stats["stale_hits"] += 1
+            self._refresh(path)
+            return cached[0]
+        self._stats["misses"] += 1
+        #shielded, so a caller that goes away doesn't cancel the fetch others are waiting on
+        return await asyncio.shield(self._refresh(path))
+
+    async def embeddable_dashboards(self):
+        return await self.embeddable("/api/dashboard")
+
+    async def embeddable_cards(self):
+        return await self.embeddable("/api/card")
+
+    def stats(self):
+        return {**self._stats, "session_cached": self._session is not None,
+                "lists": {path: len(items) for path, (items, _) in self._lists.items()}}
+
+    async def aclose(self):
+        for task in list(self._fetches.values()):
+            task.cancel()
+        await self._http.aclose()
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+import threading, time
+
+
+#histogram bucket upper bounds, in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  #last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        #upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 3),
+            "buckets": {str(b): n for b, n in zip(list(self.buckets) + ["+Inf"], self.counts)},
+        }
+
+
+class ScrapeMetrics:
+    """Step timings and counters of a scrape, labelled by keyword and tab.
+
+    Create one per run with the process-wide `scraper_metrics` as parent: the
+    run gets its own summary and every observation also lands in the
+    process totals served by the API.
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self.started = time.time()
+
+    def observe(self, step, keyword, tab, seconds):
+        with self._lock:
+            self._histograms.setdefault((step, keyword, tab), Histogram()).observe(seconds)
+        if self.parent is not None:
+            self.parent.observe(step, keyword, tab, seconds)
+
+    def incr(self, name, keyword, tab, n=1):
+        with self._lock:
+            key = (name, keyword, tab)
+            self._counters[key] = self._counters.get(key, 0) + n
+        if self.parent is not None:
+            self.parent.incr(name, keyword, tab, n)
+
+    @contextmanager
+    def timer(self, step, keyword, tab):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(step, keyword, tab, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Every histogram and counter with its labels, for the metrics endpoint."""
+        with self._lock:
+            return {
+                "histograms": [
+                    {"step": s, "keyword": k, "tab": t, **h.to_dict()}
+                    for (s, k, t), h in sorted(self._histograms.items(), key=lambda i: tuple(map(str, i[0])))
+                ],
+                "counters": [
+                    {"name": n, "keyword": k, "tab": t, "value": v}
+                    for (n, k, t), v in sorted(self._counters.items(), key=lambda i: tuple(map(str, i[0])))
+                ],
+            }
+
+    def summary(self):
+        """Per-step totals across keywords and tabs, slowest step first."""
+        with self._lock:
+            steps = {}
+            for (step, _, _), h in self._histograms.items():
+                steps.setdefault(step, Histogram()).merge(h)
+            counters = {}
+            for (name, _, _), v in self._counters.items():
+                counters[name] = counters.get(name, 0) + v
+        ordered = sorted(steps.items(), key=lambda i: i[1].total, reverse=True)
+        return {
+            "wall_seconds": round(time.time() - self.started, 1),
+            "steps": {step: {k: v for k, v in h.to_dict().items() if k != "buckets"} for step, h in ordered},
+            "counters": counters,
+        }
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [f"Scrape finished in {summary['wall_seconds']}s"]
+        for step, s in summary["steps"].items():
+            lines.append(f"  {step:<16} n={s['count']:<5} total={s['sum']:>8.1f}s mean={s['mean']:.2f}s "
+                         f"p95<={s['p95']}s max={s['max']:.2f}s")
+        for name, value in summary["counters"].items():
+            lines.append(f"  {name:<16} {value}")
+        return "\n".join(lines)
+
+
+#totals since the process started, across all runs
+scraper_metrics = ScrapeMetrics()
@@ -0,0 +1,245 @@
+"""Schemas of the backend databases as numbered migrations, applied by Database.migrate.
+
+Each list entry is one schema version: the statements that take a file
+from the previous version to it. Append new versions; never edit or
+reorder released ones, since files already at that version won't rerun them.
+Version 1 matches the tables the API created before versions were tracked,
+so existing files upgrade in place.
+"""
+from dedup import tender_key
+
+
+USERS_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            email TEXT,
+            hashed_password TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+]
+
+REFRESH_TOKENS_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            token TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+    [
+        #every /refresh_token call looks its token up, and compaction deletes by age
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_token ON refresh_tokens (username, token)",
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_created_at ON refresh_tokens (created_at)",
+    ],
+]
+
+TENDERS_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS tenders
+            (id INTEGER PRIMARY KEY,
+             title TEXT NOT NULL,
+             tender_number TEXT,
+             agency TEXT NOT NULL,
+             ref_number TEXT,
+             awarded TEXT NOT NULL,
+             awardee TEXT,
+             respondents TEXT NOT NULL,
+             num_of_respondents INTEGER NOT NULL,
+             keywords TEXT NOT NULL,
+             ai_prediction BOOLEAN,
+             ai_confidence REAL,
+             user_decision BOOLEAN,
+             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
+        """,
+    ],
+    [
+        #saved decisions are matched by tender number, or by title where there is none
+        "CREATE INDEX IF NOT EXISTS idx_tenders_tender_number ON tenders (tender_number)",
+        "CREATE INDEX IF NOT EXISTS idx_tenders_title ON tenders (title)",
+        "CREATE INDEX IF NOT EXISTS idx_tenders_agency ON tenders (agency)",
+        "CREATE INDEX IF NOT EXISTS idx_tenders_awarded ON tenders (awarded)",
+    ],
+    [
+        #keys of every saved tender, so the scraper can skip known ones; seeded by dedup.load_tender_index
+        """
+        CREATE TABLE IF NOT EXISTS tender_index (
+            key TEXT PRIMARY KEY
+        )
+        """,
+    ],
+    [
+        #title keys were stored for numbered tenders too; reseed it with dedup.record_keys as it is now
+        "DELETE FROM tender_index",
+        lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO tender_index (key) VALUES (?)",
+            {(tender_key(number, title),)
+             for number, title in conn.execute("SELECT tender_number, title FROM tenders").fetchall()},
+        ),
+    ],
+    [
+        #saved decisions are matched on dedup.tender_key, which normalizes titles in ways SQL can't
+        "ALTER TABLE tenders ADD COLUMN tender_key TEXT",
+        lambda conn: conn.executemany(
+            "UPDATE tenders SET tender_key = ? WHERE id = ?",
+            [(tender_key(number, title), row_id)
+             for row_id, number, title in conn.execute("SELECT id, tender_number, title FROM tenders").fetchall()],
+        ),
+        "CREATE INDEX IF NOT EXISTS idx_tenders_tender_key ON tenders (tender_key)",
+    ],
+]
+
+CRAWL_STATE_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS crawl_runs (
+            job_id TEXT PRIMARY KEY,
+            started_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS crawl_pages (
+            job_id TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            tab TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            PRIMARY KEY (job_id, keyword, tab, page)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS crawl_tabs (
+            job_id TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            tab TEXT NOT NULL,
+            finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, keyword, tab)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS crawl_tenders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            tab TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            record TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_crawl_tenders_tab ON crawl_tenders (job_id, keyword, tab)",
+    ],
+    [
+        #tenders whose detail page failed; their page stays unfinished until a retry gets them
+        """
+        CREATE TABLE IF NOT EXISTS crawl_skipped (
+            job_id TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            tab TEXT NOT NULL,
+            title TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            error TEXT,
+            PRIMARY KEY (job_id, keyword, tab, title)
+        )
+        """,
+    ],
+]
+
+
+JOBS_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            keywords TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress TEXT,
+            result_count INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            cancel_requested_at TIMESTAMP,
+            timings TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            record TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_job_results_job ON job_results (job_id, id)",
+    ],
+    [
+        #pid of the long-lived worker process running the job
+        "ALTER TABLE jobs ADD COLUMN worker INTEGER",
+    ],
+]
+
+
+DETAIL_CACHE_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS tender_cache (
+            tender_number TEXT PRIMARY KEY,
+            title_key TEXT NOT NULL,
+            link TEXT,
+            status TEXT NOT NULL,
+            record TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tender_cache_link ON tender_cache (link)",
+        "CREATE INDEX IF NOT EXISTS idx_tender_cache_title ON tender_cache (title_key)",
+    ],
+    [
+        #lookups go by link only; titles repeat across years and agencies
+        "DROP INDEX IF EXISTS idx_tender_cache_title",
+        "ALTER TABLE tender_cache DROP COLUMN title_key",
+    ],
+]
+
+
+CLASSIFY_CACHE_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS classification_cache (
+            key TEXT PRIMARY KEY,
+            model_version TEXT NOT NULL,
+            ai_prediction BOOLEAN NOT NULL,
+            ai_confidence REAL NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+    ],
+]
+
+
+def compact_refresh_tokens(database, issued_before, batch_size=10000):
+    """Delete refresh tokens issued before `issued_before` (a naive UTC datetime), which have expired.
+
+    Rotated tokens are deleted when they are rotated; this removes the ones
+    that were simply never used again. Deletes go in batches so a large
+    backlog never holds the write lock for long. Returns the rows removed.
+    """
+    removed = 0
+    while True:
+        with database.connection() as conn:
+            deleted = conn.execute("""
+                DELETE FROM refresh_tokens WHERE id IN (
+                    SELECT id FROM refresh_tokens WHERE created_at < ? LIMIT ?
+                )
+            """, (issued_before, batch_size)).rowcount
+        removed += deleted
+        if deleted < batch_size:
+            return removed
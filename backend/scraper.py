@@ -1,32 +1,51 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from concurrent.futures import ThreadPoolExecutor
+from tender_detail import make_http_session, fetch_tender_detail
+from dedup import TenderIndex, tender_key
+from drivers import DriverPool, count_page
+from metrics import ScrapeMetrics, scraper_metrics
+import queue, threading, time
 import pandas as pd
 
 
-all_results = []
+class ScrapeCancelled(Exception):
+    pass
 
-def init_driver(): #this function helps to initialize the Chrome driver
-    options = Options()
-    #options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    return driver
+class ScrapeIncomplete(Exception):
+    """Some (keyword, tab) tasks still failed after their retries; `results` holds what the others found."""
+    def __init__(self, failed, results):
+        super().__init__(f"{len(failed)} scrape task(s) failed: " + ", ".join(f"{tag} tab of {keyword}" for keyword, tag in failed))
+        self.failed = failed
+        self.results = results
 
-    
-def scrape_by_keyword(keyword , past_results):
-    results = []
-    driver = init_driver()
+class TendersSkipped(Exception):
+    """A tab was paged through, but some of its tenders failed and their pages were left unfinished."""
+    def __init__(self, keyword, tab, titles, results):
+        super().__init__(f"{len(titles)} tender(s) in the {tab} tab of {keyword} failed: " + "; ".join(titles))
+        self.titles = titles
+        self.results = results
+
+class ScrapeRun:
+    """What every task of one scrape shares: known tenders, checkpoints, event callback, cancel flag, metrics and cache."""
+    def __init__(self, index=None, fast_path=True, state=None, on_event=None, cancel=None, metrics=None, cache=None):
+        self.index = index if index is not None else TenderIndex()
+        self.fast_path = fast_path
+        self.state = state
+        self.on_event = on_event
+        self.cancel = cancel
+        self.metrics = metrics if metrics is not None else ScrapeMetrics(parent=scraper_metrics)
+        self.cache = cache
+
+    def cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
+
+def search_keyword(driver, wait, keyword): #loads GeBiz and runs a search for the keyword
     url = 'https://www.gebiz.gov.sg/' #GeBiz URL
     driver.get(url)
-    wait = WebDriverWait(driver, 5) #wait for the page to load
+    count_page(driver)
     try:
         ##print("Finding the search box…")
         #wait for the searh box to load
@@ -36,7 +55,7 @@ def scrape_by_keyword(keyword , past_results):
     except Exception as e:
         ##print("Failed to load the search box.")
         print(e)
-        return
+        return False
     kw.clear()                                                                                  #clear the search box
     ##print("Entering search term…")                                                              
     kw.send_keys(keyword)
@@ -44,179 +63,347 @@ def scrape_by_keyword(keyword , past_results):
     EC.element_to_be_clickable((By.ID, "contentForm:j_idt187_searchBar_BUTTON-GO")))        #wait for the search button to be clickable
     go_btn.click()
     ##print("Clicking search button…")
-    #scrape open tab first
-    open_results = scrape_current_tab(driver, wait, "Open", past_results)
-    for r in open_results:
-        if r not in results:
-            results.append(r)
-    #scrape closed tab
+    return True
+
+def open_closed_tab(driver, wait): #switches the search results over to the closed tab
+    old = WebDriverWait(driver, 5).until(
+        EC.presence_of_element_located((By.ID, "contentForm:j_idt794_TabAction_1"))
+    )                                                                                         
+    closed_tab = wait.until(
+        EC.element_to_be_clickable((By.ID, "contentForm:j_idt794_TabAction_1"))
+    )
+    closed_tab.click()
+    ##print("Clicking closed tab…")
+    WebDriverWait(driver, 5).until(EC.staleness_of(old)) #wait for the old element to be stale
+
+def scrape_keyword_tab(driver, keyword, tag, run): #scrapes one tab ("Open" or "Closed") of one keyword
+    index, state, on_event, metrics = run.index, run.state, run.on_event, run.metrics
+    if state is not None:
+        #tenders saved by an earlier attempt of this job are not opened again
+        for record in state.tenders(keyword, tag):
+            if index.claim(record) and on_event is not None:
+                on_event({"event": "tender", "keyword": keyword, "tab": tag, "result": record})
+        if state.is_tab_done(keyword, tag):
+            return [] if on_event is not None else state.tenders(keyword, tag)
+    if on_event is not None:
+        on_event({"event": "progress", "keyword": keyword, "tab": tag, "page": None})
+    wait = WebDriverWait(driver, 5) #wait for the page to load
+    with metrics.timer("search", keyword, tag):
+        found = search_keyword(driver, wait, keyword)
+    #raised rather than returning nothing, so the task is retried and reported failed like any other
+    if not found:
+        raise TimeoutException(f"GeBiz search box did not load for {keyword}")
+    if tag == "Closed":
+        with metrics.timer("closed_tab", keyword, tag):
+            open_closed_tab(driver, wait)
+    #detail pages are fetched over HTTP with the browser's cookies; Chrome is only the fallback
+    http_session = make_http_session(driver) if run.fast_path else None
     try:
-        old = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "contentForm:j_idt794_TabAction_1"))
-        )                                                                                         
-        closed_tab = wait.until(
-            EC.element_to_be_clickable((By.ID, "contentForm:j_idt794_TabAction_1"))
-        )
-        closed_tab.click()
-        ##print("Clicking closed tab…")
-        WebDriverWait(driver, 5).until(EC.staleness_of(old)) #wait for the old element to be stale
-        closed_results = scrape_current_tab(driver, wait, "Closed")
-    except Exception as e:
-        ##print("Failed to find closed tab.")
-        closed_results = []
-    
-    for r in closed_results:
-        if r not in results:
-            results.append(r)
-    
-    driver.quit()
+        results = scrape_current_tab(driver, wait, keyword, tag, run, http_session=http_session)
+    finally:
+        if http_session is not None:
+            http_session.close()
+    if state is not None and on_event is None:
+        return state.tenders(keyword, tag)
     return results
 
+def merge_results(result_lists): #merges per-tab results, dropping tenders already seen
+    merged = []
+    seen = set()
+    for results in result_lists:
+        for r in results or []:
+            key = tender_key(r.get("Tender Number"), r.get("Title"))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(r)
+    return merged
+
+def scrape_keywords(keywords, run, pool=None, pool_size=4, retries=2):
+    """Scrape every keyword's Open and Closed tabs, `pool_size` (keyword, tab) tasks at a time on browsers from `pool`.
+
+    A failed task is retried on a fresh browser up to `retries` times, resuming
+    from `run.state`; tasks that still fail raise ScrapeIncomplete once the rest
+    are done. With `run.on_event`, tenders are streamed instead of returned.
+    """
+    tasks = [(keyword, tag) for keyword in keywords for tag in ("Open", "Closed")]
+    if not tasks:
+        return []
+    pool_size = max(1, min(pool_size, len(tasks)))
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(pool_size)
+    failed = []
+
+    def run_task(keyword, tag):
+        partial = []  #tenders kept by attempts that skipped some, when there is no CrawlState to hold them
+        for attempt in range(retries + 1):
+            if run.cancelled():
+                return []
+            try:
+                driver = pool.acquire()
+            except Exception as e:
+                print(f"Could not get a browser for {tag} tab of {keyword}: {e}")
+                continue
+            broken = False
+            try:
+                print(f"Scraping {tag} tab for keyword: {keyword}")
+                results = scrape_keyword_tab(driver, keyword, tag, run)
+                return results if run.state is not None else partial + results
+            except ScrapeCancelled:
+                return []
+            except TendersSkipped as e:
+                #the browser is fine; the retry only opens the tenders that failed
+                print(f"Retrying {tag} tab for {keyword} (attempt {attempt + 1}): {e}")
+                run.metrics.incr("task_failures", keyword, tag)
+                partial.extend(e.results)
+            except Exception as e:
+                print(f"Failed to scrape {tag} tab for {keyword} (attempt {attempt + 1}): {e}")
+                run.metrics.incr("task_failures", keyword, tag)
+                #the session may be dead, so retire it and retry on a fresh one
+                broken = True
+            finally:
+                pool.release(driver, broken=broken)
+        failed.append((keyword, tag))
+        if run.state is not None and run.on_event is None:
+            return run.state.tenders(keyword, tag)
+        return partial
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            futures = [executor.submit(run_task, keyword, tag) for keyword, tag in tasks]
+            #keep the task order so the merged results stay grouped by keyword
+            results = merge_results([f.result() for f in futures])
+        if failed and not run.cancelled():
+            raise ScrapeIncomplete([task for task in tasks if task in failed], results)
+        return results
+    finally:
+        if own_pool:
+            pool.close()
+        print(run.metrics.format_summary())
+
+def iter_scrape_events(keywords, run, **kwargs):
+    """Run scrape_keywords in the background and yield its events as they happen; sets `run`'s on_event and cancel.
+
+    Yields progress and tender events, then a final {"event": "done"} (or
+    {"event": "error"}, listing the failed tasks if some failed) once every task has finished. Closing the generator
+    early cancels the scrape.
+    """
+    events = queue.Queue()
+    done = object()
+    cancel = threading.Event()
+
+    run.on_event, run.cancel = events.put, cancel
+
+    def scrape():
+        try:
+            scrape_keywords(keywords, run, **kwargs)
+            events.put({"event": "done"})
+        except ScrapeIncomplete as e:
+            events.put({"event": "error", "detail": str(e),
+                        "failed": [{"keyword": keyword, "tab": tag} for keyword, tag in e.failed]})
+        except Exception as e:
+            events.put({"event": "error", "detail": str(e)})
+        finally:
+            events.put(done)
+
+    worker = threading.Thread(target=scrape, daemon=True)
+    worker.start()
+    try:
+        while True:
+            event = events.get()
+            if event is done:
+                return
+            yield event
+    finally:
+        #the consumer went away (e.g. the client disconnected): stop scraping
+        cancel.set()
+
+#Each script below reads everything a page view needs in one WebDriver round trip,
+#instead of a find_element/.text command pair per field.
+OVERVIEW_JS = """
+function labelValue(label) {
+    const xpath = "//span[normalize-space(.)='" + label + "']"
+        + "/ancestor::div[contains(@class,'col-md-3')]"                 //up to the label's row
+        + "/following-sibling::div[contains(@class,'col-md-9')]"        //the value's container
+        + "//div[contains(@class,'formOutputText_VALUE-DIV')]";         //the value itself
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return node ? node.innerText.trim() : null;
+}
+const status = document.getElementById("j_idt238");
+return {
+    tender_num: labelValue("Tender No."),
+    quotation: labelValue("Quotation No."),
+    agency: labelValue("Agency"),
+    ref_num: labelValue("Reference No."),
+    awarded: status ? status.innerText.trim() : null,
+};
+"""
+
+RESPONDENTS_JS = """
+const rows = [];
+for (const block of document.querySelectorAll(".formAccordion_MAIN")) {
+    const bar = block.querySelector(".formAccordion_TITLE-BAR");
+    const name = block.querySelector(".formAccordion_TITLE-TEXT");
+    if (bar && name) {
+        rows.push([name.innerText.trim(), bar.innerText.trim()]);
+    }
+}
+return rows;
+"""
+
+#title, link and tender number of every row on a results page
+LISTING_JS = """
+const rows = [];
+for (const link of document.querySelectorAll(".commandLink_TITLE-BLUE")) {
+    //up to the largest block around the link that holds no other listing
+    let row = link;
+    while (row.parentElement && row.parentElement.querySelectorAll(".commandLink_TITLE-BLUE").length === 1) {
+        row = row.parentElement;
+    }
+    const number = row.innerText.match(/\\b[A-Z]{2,6}\\d{3}ET[A-Z]\\d{8}\\b/);
+    rows.push([link.innerText.trim(), link.href, number ? number[0] : null]);
+}
+return rows;
+"""
+
+AWARDEES_JS = """
+const names = [];
+for (const sec of document.querySelectorAll("div.formSectionHeader4_MAIN")) {
+    const header = sec.querySelector("div.formSectionHeader4_TEXT");
+    if (!header || header.innerText.trim() !== "Awarded to") continue;
+    //its next formOutputText_MAIN sibling holds the awardee name
+    let content = sec.nextElementSibling;
+    while (content && !content.classList.contains("formOutputText_MAIN")) {
+        content = content.nextElementSibling;
+    }
+    const nameDiv = content && content.querySelector("div.formOutputText_HIDDEN-LABEL.outputText_TITLE-BLACK");
+    const text = nameDiv ? nameDiv.innerText.trim() : "";
+    if (text) names.push(text);
+}
+return names;
+"""
+
 def scrape_awardees(driver, wait, timeout=10):
-    awardee=[]
     #wait for and find the "Awarded to" header
     wait.until(EC.presence_of_element_located((
         By.CSS_SELECTOR, "div.formSectionHeader4_MAIN"
     )))
-    sections = driver.find_elements(By.CSS_SELECTOR, "div.formSectionHeader4_MAIN")
-    
-    print(len(sections))
-    for sec in sections:
-        try:
-            #get just the header text inside this section
-            header = sec.find_element(By.CSS_SELECTOR, "div.formSectionHeader4_TEXT").text.strip()
-        except:
-            continue
-        
-        if header != "Awarded to":
-            #skip any other section
-            continue
-        
-        #find its next sibling, which holds the awardee name
-        try:
-            content = sec.find_element(
-                By.XPATH,
-                "following-sibling::div[contains(@class,'formOutputText_MAIN')]"
-            )
-            #within that, pull the black-label div
-            name_div = content.find_element(
-                By.CSS_SELECTOR, "div.formOutputText_HIDDEN-LABEL.outputText_TITLE-BLACK"
-            )
-            text = name_div.text.strip()
-            if text:
-                awardee.append(text)
-        except Exception:
-            #if anything here fails, skip this section
-            continue
-    return awardee
+    return driver.execute_script(AWARDEES_JS)
         
     
-def scrape_current_tab(driver, wait, tag, past_results):
-    page_results = []
-    def grab_links():
-        #wait for new search results to load
-        wait.until(
-            EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
+def scrape_tender_selenium(driver, wait, title, link, metrics=None, keyword=None, tab=None): #opens a tender detail page in Chrome and scrapes it
+    metrics = metrics if metrics is not None else ScrapeMetrics()
+    step_start = time.perf_counter()
+    def lap(step): #records the time since the previous lap under `step`
+        nonlocal step_start
+        now = time.perf_counter()
+        metrics.observe(step, keyword, tab, now - step_start)
+        step_start = now
+    driver.get(link)
+    count_page(driver)
+    ##print(f"Clicked on link... {link}")
+    wait.until(EC.presence_of_element_located((
+        By.CLASS_NAME, "formOutputText_VALUE-DIV"
+    )))
+    lap("detail_load")
+    fields = driver.execute_script(OVERVIEW_JS)
+    lap("field_extraction")
+    tender_num = fields["tender_num"] if fields["tender_num"] is not None else fields["quotation"]
+    if tender_num is None:
+        ##print(f"Skipping tender {title} due to missing Tender/Quotation number.")
+        return
+    if fields["agency"] is None or fields["awarded"] is None:
+        raise NoSuchElementException(f"Agency or status missing on {link}")
+    agency = fields["agency"]
+    Ref_Num = fields["ref_num"] or "N/A"
+    awarded = fields["awarded"]
+    ##print(f"Reference Number: {Ref_Num}")
+    try:
+        respondents_btn = wait.until(
+            EC.element_to_be_clickable((By.CLASS_NAME, "formTabBar_TAB-BUTTON"))
         )
-        #scrape the tender titles
-        link_elems = driver.find_elements(By.CLASS_NAME, "commandLink_TITLE-BLUE")
-        links = [(e.text.strip(), e.get_attribute("href")) for e in link_elems]
-        return links
-    
-    def scrape_single_tender(title, link):
-        Quote = False
-        driver.get(link)
-        ##print(f"Clicked on link... {link}")
+        respondents_btn.click()
+        ##print("Clicking on respondents button…")
         wait.until(EC.presence_of_element_located((
-            By.CLASS_NAME, "formOutputText_VALUE-DIV"
+            By.CLASS_NAME, "formAccordion_TITLE-TEXT" 
         )))
-        try:
-            tender_num = driver.find_element(
-                By.XPATH,
-                "//span[normalize-space(.)='Tender No.']"
-                "/ancestor::div[contains(@class,'col-md-3')]"                   #up to the label’s row
-                "/following-sibling::div[contains(@class,'col-md-9')]"          #the value’s container
-                "//div[contains(@class,'formOutputText_VALUE-DIV')]"            #the value itself
-            ).text.strip()
-        except Exception as e:
-            try:
-                quotation = driver.find_element(
-                    By.XPATH,
-                    "//span[normalize-space(.)='Quotation No.']"
-                    "/ancestor::div[contains(@class,'col-md-3')]"                   #up to the label’s row
-                    "/following-sibling::div[contains(@class,'col-md-9')]"          #the value’s container
-                    "//div[contains(@class,'formOutputText_VALUE-DIV')]"            #the value itself
-                ).text.strip()
-                Quote = True
-            except Exception as e:
-                ##print(f"Skipping tender {title} due to missing Tender/Quotation number.")
-                return
-        agency = driver.find_element(
-            By.XPATH,
-            "//span[normalize-space(.)='Agency']"
-            "/ancestor::div[contains(@class,'col-md-3')]"                   #up to the label’s row
-            "/following-sibling::div[contains(@class,'col-md-9')]"          #the value’s container
-            "//div[contains(@class,'formOutputText_VALUE-DIV')]"            #the value itself
-        ).text.strip()
-        try:
-            Ref_Num = driver.find_element(
-            By.XPATH,
-            "//span[normalize-space(.)='Reference No.']"
-            "/ancestor::div[contains(@class,'col-md-3')]"                   #up to the label’s row
-            "/following-sibling::div[contains(@class,'col-md-9')]"          #the value’s container
-            "//div[contains(@class,'formOutputText_VALUE-DIV')]"            #the value itself
-            ).text.strip()
-            if Ref_Num == "":
-                Ref_Num = "N/A"
-        except Exception as e:
-            Ref_Num = "N/A"
-        ##print(f"Reference Number: {Ref_Num}")
-        awarded = driver.find_element(
-        By.ID, "j_idt238"
-        ).text.strip()   
-        try:
-            respondents_btn = wait.until(
-                EC.element_to_be_clickable((By.CLASS_NAME, "formTabBar_TAB-BUTTON"))
+        respondent_data = [tuple(r) for r in driver.execute_script(RESPONDENTS_JS)]
+        lap("respondents")
+        if awarded == "AWARDED":
+            ##print("Tender has been awarded, scraping awardee…")
+            awarded_btn = wait.until(                        
+                EC.element_to_be_clickable((By.NAME, "contentForm:j_idt229_TabAction_2"))
             )
-            respondents_btn.click()
-            ##print("Clicking on respondents button…")
-            wait.until(EC.presence_of_element_located((
-                By.CLASS_NAME, "formAccordion_TITLE-TEXT" 
-            )))
-            respondent_data = []
-            accordion_blocks = driver.find_elements(By.CLASS_NAME, "formAccordion_MAIN")
-            for block in accordion_blocks:
-                try:
-                    amount_elem = block.find_element(By.CLASS_NAME, "formAccordion_TITLE-BAR")
-                    amount = amount_elem.text.strip()
-                    respondent_elem = block.find_element(By.CLASS_NAME, "formAccordion_TITLE-TEXT")
-                    respondent = respondent_elem.text.strip()                        
-                    respondent_data.append((respondent, amount))
-                    ##print(f"Respondent: {respondent}, Amount: {amount}")
-                except Exception as e:
-                    pass
-                    ##print("Failed to find respondent or amount.")    
-            if awarded == "AWARDED":
-                ##print("Tender has been awarded, scraping awardee…")
-                awarded_btn = wait.until(                        
-                    EC.element_to_be_clickable((By.NAME, "contentForm:j_idt229_TabAction_2"))
-                )
-                awarded_btn.click()
-                ##print("Clicking on awarded button…")
-                awardee = scrape_awardees(driver, wait)
-                time.sleep(2)
-            else:
-                    awardee = "N/A"
-        except Exception as e:
-            ##print(f"No respondents found or failed to scrape them.")
-            respondent_data = "N/A"
-            awardee = "N/A"
-        if Quote:
-            print(f"Title: {title} Quotation Number: {quotation} Agency: {agency} ref_num: {Ref_Num} Awarded: {awarded} Respondents: {respondent_data} Awardee: {awardee}")
-            page_results.append({"Title": title, "Tender Number": quotation, "Agency": agency , "Ref_Num": Ref_Num, "Awarded": awarded, "Respondents": respondent_data, "Awardee": awardee})
+            awarded_btn.click()
+            ##print("Clicking on awarded button…")
+            awardee = scrape_awardees(driver, wait)
+            lap("awardees")
+            time.sleep(2)
+            lap("awardee_sleep")
+        else:
+                awardee = "N/A"
+    except Exception as e:
+        ##print(f"No respondents found or failed to scrape them.")
+        lap("respondents")
+        respondent_data = "N/A"
+        awardee = "N/A"
+    print(f"Title: {title} Tender Number: {tender_num} Agency: {agency} ref_num: {Ref_Num} Awarded: {awarded} Respondents: {respondent_data} Awardee: {awardee}")
+    return {"Title": title, "Tender Number": tender_num, "Agency": agency , "Ref_Num": Ref_Num, "Awarded": awarded, "Respondents": respondent_data, "Awardee": awardee}
+
+def scrape_current_tab(driver, wait, keyword, tag, run, http_session=None):
+    page_results = []
+    index, state, on_event, metrics, cache = run.index, run.state, run.on_event, run.metrics, run.cache
+    #pages finished by an earlier attempt of this job are paged through without scraping
+    finished = state.finished_pages(keyword, tag) if state is not None else set()
+    skipped = []
+    def grab_links():
+        with metrics.timer("grab_links", keyword, tag):
+            #wait for new search results to load
+            wait.until(
+                EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
+            )
+            #the tender number on each row lets known tenders be skipped without opening them
+            links = driver.execute_script(LISTING_JS)
+        return links
+    
+    def keep(record, page):
+        if not index.claim(record):
+            return
+        metrics.incr("tenders_scraped", keyword, tag)
+        if state is not None:
+            state.save_tender(keyword, tag, page, record) #checkpoint every tender as soon as it is parsed
+        if on_event is not None:
+            on_event({"event": "tender", "keyword": keyword, "tab": tag, "result": record})
         else:
-            print(f"Title: {title} Tender Number: {tender_num} Agency: {agency} ref_num: {Ref_Num} Awarded: {awarded} Respondents: {respondent_data} Awardee: {awardee}")
-            page_results.append({"Title": title, "Tender Number": tender_num, "Agency": agency , "Ref_Num": Ref_Num, "Awarded": awarded, "Respondents": respondent_data, "Awardee": awardee}) 
+            page_results.append(record)
+    
+    def scrape_single_tender(title, link, page): #returns True if the browser navigated away from the results
+        #tenders in a final status don't change, so a cached copy saves opening the page at all
+        if cache is not None:
+            record = cache.get(title, link)
+            if record is not None:
+                metrics.incr("cache_hits", keyword, tag)
+                keep(record, page)
+                return False
+            metrics.incr("cache_misses", keyword, tag)
+        #try the HTTP fast path first and only drive Chrome if the static page is missing fields
+        if http_session is not None:
+            with metrics.timer("detail_http", keyword, tag):
+                record = fetch_tender_detail(http_session, title, link)
+            if record is not None:
+                metrics.incr("http_fast_path", keyword, tag)
+                if cache is not None:
+                    cache.put(record, link)
+                keep(record, page)
+                return False
+            metrics.incr("selenium_fallback", keyword, tag)
+        record = scrape_tender_selenium(driver, wait, title, link, metrics, keyword, tag)
+        if record is not None:
+            if cache is not None:
+                cache.put(record, link)
+            keep(record, page)
+        return True
     
     def back_to_results():
         try:
@@ -240,51 +427,96 @@ def scrape_current_tab(driver, wait, tag, past_results):
             print(e)
             return
         
+    def scrape_page(page, page_links):
+        metrics.incr("pages", keyword, tag)
+        if on_event is not None:
+            on_event({"event": "progress", "keyword": keyword, "tab": tag, "page": page})
+        page_skipped = []
+        for title_text, href, number in page_links:
+            if run.cancelled():
+                raise ScrapeCancelled()
+            if not index.claim_listing(title_text, number):
+                #print(f"Skipping {title_text} as it has already been scraped.")
+                metrics.incr("tenders_skipped", keyword, tag)
+                continue
+            tender_start = time.perf_counter()
+            try:
+                navigated = scrape_single_tender(title_text, href, page)
+            except (NoSuchElementException, TimeoutException) as e:
+                #a malformed or slow detail page only costs this tender, not the crawl
+                print(f"Skipping {title_text}: {e}")
+                metrics.incr("tenders_failed", keyword, tag)
+                index.release_listing(title_text, number)
+                page_skipped.append(title_text)
+                if state is not None:
+                    state.skip_tender(keyword, tag, page, title_text, str(e))
+                navigated = True
+            except Exception:
+                index.release_listing(title_text, number) #so a retry picks this tender up again
+                raise
+            if navigated:
+                with metrics.timer("navigate_back", keyword, tag):
+                    back_to_results() #go back to the results page
+                    wait.until(
+                    EC.presence_of_all_elements_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
+                    )
+            metrics.observe("tender", keyword, tag, time.perf_counter() - tender_start)
+        skipped.extend(page_skipped)
+        #a page with failed tenders stays unfinished, so a retry opens them again
+        if state is not None and not page_skipped:
+            state.finish_page(keyword, tag, page)
+
     try:
         page_links = grab_links()
         old = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
         )
-        for title_text, href in page_links:
-            if title_text in past_results:
-                continue
-            if not any(r["Title"] == title_text for r in all_results):
-                scrape_single_tender(title_text, href)
-                back_to_results() #go back to the results page
-                wait.until(
-                EC.presence_of_all_elements_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
-                )
-            else:
-                #print(f"Skipping {title_text} as it has already been scraped.")
-                continue
-    except Exception as e:
-        pass
+    except TimeoutException:
         #print("Failed to find tender listings.")
+        if state is not None:
+            state.finish_tab(keyword, tag)
+        return page_results
+    if 1 not in finished:
+        scrape_page(1, page_links)
     i = 2; #for next button to start from page 2
     while True:   
         try:
             next_button = wait.until(
                 EC.element_to_be_clickable((By.ID, f"contentForm:j_idt906:j_idt957_Next_{i}"))
                 )
+        except TimeoutException:
+            #print(f"Total pages: {i-1}")
+            break
+        with metrics.timer("pagination", keyword, tag):
             next_button.click()
+            count_page(driver)
             #print(f"Clicking next button for page {i}…") # for debugging
             WebDriverWait(driver, 15).until(EC.staleness_of(old)) #wait for the old element to be stale
-            i += 1 #to increment and find the next button for subsequent pages if any.
-            page_links = grab_links()
-            old = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
-            )
-            for title_text, href in page_links:
-                scrape_single_tender(title_text,href)
-                back_to_results() #go back to the results page
-                wait.until(
-                EC.presence_of_all_elements_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
-                )
-        except:
-            #print(f"Total pages: {i-1}")
-            break
+        page = i
+        i += 1 #to increment and find the next button for subsequent pages if any.
+        page_links = grab_links()
+        old = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "commandLink_TITLE-BLUE"))
+        )
+        if page not in finished:
+            scrape_page(page, page_links)
+    if skipped:
+        raise TendersSkipped(keyword, tag, skipped, page_results)
+    if state is not None:
+        state.finish_tab(keyword, tag)
     return page_results
         
+def format_result(result): #flattens the respondents list into the "name - amount | ..." string the frontend shows
+    respondents = result.get("Respondents")
+    if isinstance(respondents, list):
+        formatted = [f"{r} - {a}" for r, a in respondents]
+        result["Respondents"] = " | ".join(formatted)
+        result["Num of Respondents"] = len(respondents)
+    else:
+        result["Respondents"] = "N/A"
+        result["Num of Respondents"] = 0
+    return result
+
 def save_to_csv(results, filename="gebiz_tenders.csv"):
     if not results:
         print("No results to save.")
@@ -308,13 +540,7 @@ def save_to_csv(results, filename="gebiz_tenders.csv"):
 if __name__ == "__main__": #main function to run the script. Mostly used for testing.
     print("Starting GeBIZ scraper…")
     Keywords = ["Facilities Management", "IFM", "Integrated FM", "Integrated Facilities Management", "Integrated Building Services", "Building Services", "Managing Agent"]
-    for keyword in Keywords:
-        print(f"Scraping for keyword: {keyword}")
-        keyword_results = []
-        keyword_results.extend(scrape_by_keyword(keyword))
-        for result in keyword_results:
-            if result not in all_results:
-                all_results.append(result)
+    all_results = scrape_keywords(Keywords, ScrapeRun(), pool_size=4)
     save_to_csv(all_results)
     print("Scrape complete.") 
 '''  
\ No newline at end of file
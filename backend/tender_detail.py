@@ -0,0 +1,140 @@
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+
+
+#XPath for the value next to a label on the tender detail page, same layout the Selenium scraper walks
+LABEL_VALUE_XPATH = (
+    "//span[normalize-space(.)=$label]"
+    "/ancestor::div[contains(@class,'col-md-3')]"                   #up to the label’s row
+    "/following-sibling::div[contains(@class,'col-md-9')]"          #the value’s container
+    "//div[contains(@class,'formOutputText_VALUE-DIV')]"            #the value itself
+)
+
+#compiled once at import so each tender only pays for evaluation, not parsing the expressions
+find_label_value = etree.XPath(LABEL_VALUE_XPATH)
+find_status = etree.XPath("//*[@id='j_idt238']")
+find_accordions = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' formAccordion_MAIN ')]")
+find_accordion_amount = etree.XPath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' formAccordion_TITLE-BAR ')]")
+find_accordion_name = etree.XPath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' formAccordion_TITLE-TEXT ')]")
+find_section_headers = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' formSectionHeader4_MAIN ')]")
+find_section_title = etree.XPath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' formSectionHeader4_TEXT ')]")
+find_awardee_name = etree.XPath(
+    "following-sibling::div[contains(@class,'formOutputText_MAIN')][1]"
+    "//div[contains(@class,'formOutputText_HIDDEN-LABEL') and contains(@class,'outputText_TITLE-BLACK')]"
+)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+def make_http_session(driver=None, pool_size=10):
+    """Build a pooled HTTP session for GeBiz detail pages.
+
+    If a Selenium driver is given its cookies are copied over, so the session
+    sees the same search context as the browser it is helping.
+    """
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    if driver is not None:
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+
+def _text(el):
+    #mirrors Selenium's .text: visible text of the element and its children, stripped
+    return "\n".join(t.strip() for t in el.itertext() if t.strip())
+
+
+def _label_value(tree, label):
+    found = find_label_value(tree, label=label)
+    return _text(found[0]) if found else None
+
+
+def parse_tender_detail(page_html):
+    """Parse a tender detail page into the scraper's record fields.
+
+    Fields that are not present in the HTML come back as None so the caller
+    can tell "missing from this page" apart from an empty value.
+    """
+    tree = lxml_html.fromstring(page_html)
+    tender_num = _label_value(tree, "Tender No.")
+    if tender_num is None:
+        tender_num = _label_value(tree, "Quotation No.")
+    ref_num = _label_value(tree, "Reference No.")
+    status = find_status(tree)
+
+    respondents = None
+    blocks = find_accordions(tree)
+    if blocks:
+        respondents = []
+        for block in blocks:
+            amount = find_accordion_amount(block)
+            name = find_accordion_name(block)
+            if amount and name:
+                respondents.append((_text(name[0]), _text(amount[0])))
+
+    awardee = None
+    for sec in find_section_headers(tree):
+        header = find_section_title(sec)
+        if not header or _text(header[0]) != "Awarded to":
+            continue
+        awardee = awardee or []
+        for name_div in find_awardee_name(sec):
+            text = _text(name_div)
+            if text:
+                awardee.append(text)
+
+    return {
+        "Tender Number": tender_num,
+        "Agency": _label_value(tree, "Agency"),
+        "Ref_Num": ref_num or "N/A",
+        "Awarded": _text(status[0]) if status else None,
+        "Respondents": respondents,
+        "Awardee": awardee,
+    }
+
+
+def is_complete(record):
+    """True when a parsed record has every field the Selenium path would have filled in."""
+    if not record["Tender Number"] or not record["Agency"] or not record["Awarded"]:
+        return False
+    if record["Awarded"] == "OPEN":
+        return True
+    if record["Respondents"] is None:
+        return False
+    if record["Awarded"] == "AWARDED" and record["Awardee"] is None:
+        return False
+    return True
+
+
+def fetch_tender_detail(session, title, link, timeout=10):
+    """Fetch and parse a tender detail page over HTTP.
+
+    Returns a record shaped like scrape_tender_selenium's, or None if the
+    request failed or the static HTML lacks a field, in which case the caller
+    should fall back to the browser.
+    """
+    try:
+        resp = session.get(link, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"HTTP fetch failed for {title}: {e}")
+        return None
+    if resp.status_code != 200:
+        return None
+    record = parse_tender_detail(resp.content)
+    if not is_complete(record):
+        return None
+    if record["Awarded"] == "OPEN" or record["Respondents"] is None:
+        record["Respondents"] = "N/A"
+    if record["Awarded"] != "AWARDED" or record["Awardee"] is None:
+        record["Awardee"] = "N/A"
+    return {"Title": title, **record}
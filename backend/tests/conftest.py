@@ -0,0 +1,4 @@
+import os, sys
+
+#the backend modules import each other as top-level modules, as when the API runs from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+import os
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+from classifier import build_artifact, load_artifact
+
+
+TOLERANCE = 0.05  #bench.py parity's default max confidence difference
+SCALE = 100  #random heads give near-0.5 confidences; a larger head makes predictions decisive enough to compare
+KEYWORDS = ["cleaning", "facilities management"]
+TITLES = [
+    "Provision of Cleaning Services for Government Buildings",
+    "Supply and Delivery of Laptops",
+    "Integrated Facilities Management for Schools",
+    "Term Contract for Pest Control",
+    "Maintenance of Air-Conditioning Systems at Various Sites for a Period of 3 Years",
+    "Catering Services",
+    "Managing Agent Services",
+    "Call for Proposal for a Video Analytics Platform",
+]
+
+def tiny_checkpoint(path):
+    #a randomly initialised DistilBERT small enough to build in seconds, with a vocabulary of the test's words
+    words = sorted({w for text in TITLES + KEYWORDS + ["Determine tender relevance for"]
+                    for w in text.lower().replace(",", " , ").replace(":", " : ").split()})
+    os.makedirs(path)
+    with open(os.path.join(path, "vocab.txt"), "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]))
+    tokenizer = DistilBertTokenizerFast.from_pretrained(path)
+    torch.manual_seed(0)
+    config = DistilBertConfig(vocab_size=tokenizer.vocab_size, dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+    model = DistilBertForSequenceClassification(config)
+    with torch.no_grad():
+        model.classifier.weight.mul_(SCALE)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def test_onnx_matches_torch(tmp_path):
+    source = str(tmp_path / "checkpoint")
+    tiny_checkpoint(source)
+    model_dir = str(tmp_path / "models")
+    version = build_artifact(model_dir, source=source, onnx=True)
+    path = os.path.join(model_dir, version)
+
+    reference = load_artifact(path, "torch").classify_batch(TITLES, KEYWORDS)
+    results = load_artifact(path, "onnx").classify_batch(TITLES, KEYWORDS)
+    for title, (expected, expected_confidence), (prediction, confidence) in zip(TITLES, reference, results):
+        assert confidence == pytest.approx(expected_confidence, abs=TOLERANCE), title
+        #a near-tie may flip within the tolerance; anything clearer has to agree
+        if expected_confidence > 0.5 + TOLERANCE:
+            assert prediction == expected, title
@@ -0,0 +1,91 @@
+import os
+import pytest
+from tender_detail import parse_tender_detail, is_complete, fetch_tender_detail
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_open_tender():
+    record = parse_tender_detail(load("open_tender.html"))
+    assert record == {
+        "Tender Number": "NEA000ETT24000123",
+        "Agency": "National Environment Agency",
+        "Ref_Num": "NEA/PROC/2024/88",
+        "Awarded": "OPEN",
+        "Respondents": None,
+        "Awardee": None,
+    }
+    #open tenders have no respondents or awardee yet, so nothing is missing
+    assert is_complete(record)
+
+def test_awarded_quotation():
+    record = parse_tender_detail(load("awarded_quotation.html"))
+    assert record == {
+        "Tender Number": "MOE000ETQ24000456",  #from Quotation No. when there is no Tender No.
+        "Agency": "Ministry of Education",
+        "Ref_Num": "MOE-Q-456",
+        "Awarded": "AWARDED",
+        "Respondents": [
+            ("ACME FACILITIES PTE. LTD.", "$120,000.00"),
+            ("BRIGHT CLEAN SERVICES PTE. LTD.", "$135,500.00"),
+        ],
+        "Awardee": ["ACME FACILITIES PTE. LTD."],
+    }
+    assert is_complete(record)
+
+def test_missing_reference_number():
+    record = parse_tender_detail(load("no_award_without_reference.html"))
+    assert record["Tender Number"] == "HDB000ETT24000789"
+    assert record["Ref_Num"] == "N/A"
+    assert record["Awarded"] == "NO AWARD"
+    assert record["Respondents"] == [("CITY WORKS PTE. LTD.", "$88,000.00")]
+    assert record["Awardee"] is None
+    assert is_complete(record)
+
+def test_closed_without_respondents_falls_back():
+    record = parse_tender_detail(load("pending_award_without_respondents.html"))
+    assert record["Awarded"] == "PENDING AWARD"
+    assert record["Respondents"] is None
+    #the respondents list may only render in the browser, so Selenium has to open it
+    assert not is_complete(record)
+
+def test_awarded_without_awardee_falls_back():
+    page = load("awarded_quotation.html").replace(b"Awarded to", b"Remarks")
+    record = parse_tender_detail(page)
+    assert record["Awardee"] is None
+    assert not is_complete(record)
+
+@pytest.mark.parametrize("field", ["Tender Number", "Agency", "Awarded"])
+def test_missing_required_field_falls_back(field):
+    record = parse_tender_detail(load("open_tender.html"))
+    record[field] = None
+    assert not is_complete(record)
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, link, timeout=None):
+        return self.response
+
+def test_fetch_fills_in_na_for_open_tenders():
+    record = fetch_tender_detail(FakeSession(FakeResponse(200, load("open_tender.html"))), "Cleaning", "https://x")
+    assert record["Title"] == "Cleaning"
+    assert record["Respondents"] == "N/A"
+    assert record["Awardee"] == "N/A"
+
+def test_fetch_returns_none_when_selenium_is_needed():
+    page = load("pending_award_without_respondents.html")
+    assert fetch_tender_detail(FakeSession(FakeResponse(200, page)), "Cleaning", "https://x") is None
+    assert fetch_tender_detail(FakeSession(FakeResponse(503)), "Cleaning", "https://x") is None
@@ -0,0 +1,125 @@
+"""Fine-tune the relevance classifier on saved user decisions and publish it. Run from the backend folder:
+
+    python train.py train --db /path/to/mydata.db     #fine-tune, quantize, make current
+    python train.py list                              #versions, newest last
+    python train.py rollback [--to VERSION]           #back to the previous (or a given) version
+
+Training runs at low CPU priority with a small thread budget so a running
+API keeps serving; the API picks up a newly current version by itself.
+"""
+import argparse, json, os, random, sys, tempfile
+from db import Database
+
+
+def load_decisions(database):
+    rows = database.fetchall(
+        "SELECT title, keywords, user_decision FROM tenders WHERE user_decision IS NOT NULL"
+    )
+    return [(title, keywords.split("|"), bool(decision)) for title, keywords, decision in rows if title]
+
+def train(args):
+    if hasattr(os, "nice"):
+        os.nice(args.nice)
+    import torch
+    from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+    from classifier import MAX_LENGTH, build_artifact, build_prompt
+    torch.set_num_threads(args.threads)
+
+    database = Database(args.db, size=1)
+    examples = load_decisions(database)
+    database.close()
+    if len(examples) < args.min_examples:
+        print(f"Only {len(examples)} user decisions, need {args.min_examples} to train")
+        sys.exit(1)
+    random.Random(0).shuffle(examples)
+    held_out = max(1, int(len(examples) * args.eval_fraction))
+    eval_set, train_set = examples[:held_out], examples[held_out:]
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(args.base)
+    model = DistilBertForSequenceClassification.from_pretrained(args.base, num_labels=2)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
+
+    def batches(rows):
+        for start in range(0, len(rows), args.batch_size):
+            chunk = rows[start:start + args.batch_size]
+            inputs = tokenizer([build_prompt(t, k) for t, k, _ in chunk], return_tensors="pt",
+                               padding=True, truncation=True, max_length=MAX_LENGTH)
+            yield inputs, torch.tensor([int(label) for _, _, label in chunk])
+
+    for epoch in range(args.epochs):
+        model.train()
+        random.Random(epoch).shuffle(train_set)
+        total = 0.0
+        for inputs, labels in batches(train_set):
+            loss = model(**inputs, labels=labels).loss
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+            total += loss.item() * len(labels)
+        print(f"epoch {epoch + 1}/{args.epochs}: loss {total / len(train_set):.4f}")
+
+    model.eval()
+    correct = 0
+    with torch.no_grad():
+        for inputs, labels in batches(eval_set):
+            correct += (model(**inputs).logits.argmax(dim=1) == labels).sum().item()
+    accuracy = correct / len(eval_set)
+    print(f"held-out accuracy: {accuracy:.3f} on {len(eval_set)} decisions")
+
+    with tempfile.TemporaryDirectory() as checkpoint:
+        model.save_pretrained(checkpoint)
+        tokenizer.save_pretrained(checkpoint)
+        version = build_artifact(args.model_dir, source=checkpoint, onnx=args.onnx, meta={
+            "source": args.base,
+            "trained_on": len(train_set),
+            "eval_accuracy": round(accuracy, 4),
+        })
+    print(f"Published {version} and made it current")
+
+def list_versions(args):
+    from classifier import current_version, version_history, META_FILE
+    current = current_version(args.model_dir)
+    for version in version_history(args.model_dir):
+        try:
+            with open(os.path.join(args.model_dir, version, META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {}
+        details = ", ".join(f"{k}={meta[k]}" for k in ("trained_on", "eval_accuracy", "onnx") if k in meta)
+        print(f"{'*' if version == current else ' '} {version}  {details}")
+
+def rollback_version(args):
+    from classifier import rollback
+    print(f"Rolled back to {rollback(args.model_dir, args.to)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=os.getenv("CLASSIFIER_MODEL_DIR", "models"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    t = sub.add_parser("train", help="fine-tune on user decisions and publish a new version")
+    t.add_argument("--db", default="/Users/Cheokerinos/metabase_data/mydata.db")
+    t.add_argument("--base", default="distilbert-base-uncased", help="checkpoint to start from")
+    t.add_argument("--epochs", type=int, default=3)
+    t.add_argument("--batch-size", type=int, default=16)
+    t.add_argument("--lr", type=float, default=5e-5)
+    t.add_argument("--eval-fraction", type=float, default=0.1)
+    t.add_argument("--min-examples", type=int, default=50)
+    t.add_argument("--threads", type=int, default=max(1, (os.cpu_count() or 2) // 4))
+    t.add_argument("--nice", type=int, default=10, help="CPU priority increment for the training process")
+    t.add_argument("--onnx", action="store_true", help="also export int8 ONNX")
+    t.set_defaults(func=train)
+
+    sub.add_parser("list", help="published versions, current one starred").set_defaults(func=list_versions)
+
+    r = sub.add_parser("rollback", help="make the previous (or a given) version current")
+    r.add_argument("--to", help="version to roll back to")
+    r.set_defaults(func=rollback_version)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import React, { useEffect, useState, useRef } from "react";
-import authAxios from "./utilities/authAxios";
+import authAxios, { authHeader } from "./utilities/authAxios";
 import Sidebar from "./utilities/Sidebar";
 import { CloudSnowIcon } from "lucide-react";
 
@@ -14,8 +14,40 @@ export default function Generate(){
     const [classifiedTenders, setClassifiedTenders] = useState([]);
     const [userDecisions, setUserDecisions] = useState({});
     const [results, setResults] = useState(null);
+    const [progress, setProgress] = useState(null);
     const abortController = useRef(null)
 
+    // POST /generate/stream and hand every NDJSON event to onEvent as it arrives.
+    // axios can't read a streamed body, so this uses fetch with authAxios's base URL and auth header;
+    // a 401 is thrown shaped like an axios error so handleSubmit treats it like any other expired session.
+    async function streamScrape(keywords, signal, onEvent) {
+      const response = await fetch(`${authAxios.defaults.baseURL}/generate/stream`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...authHeader(),
+        },
+        body: JSON.stringify({ keywords }),
+        signal,
+      });
+      if (!response.ok) {
+        const err = new Error(`Scrape failed (${response.status})`);
+        err.response = { status: response.status };
+        throw err;
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(Boolean).forEach(line => onEvent(JSON.parse(line)));
+      }
+    }
+
 
     const handleSubmit = async (e) => {
         e.preventDefault();
@@ -25,6 +57,7 @@ export default function Generate(){
         setLoading(true);
         setError(null);
         setResults(null);
+        setProgress(null);
 
     const keywordsList = keywords
         .split(/[\n,]+/)
@@ -33,12 +66,19 @@ export default function Generate(){
     
     
     try {
-      const scraped = await authAxios.post("/generate", {
-        keywords: tags},
-        { signal: controller.signal});
-      setResults(scraped.data);
-      setScrapedData(scraped.data);
-      const titles = scraped.data.results.map(r => r.Title);
+      const scraped = [];
+      await streamScrape(tags, controller.signal, event => {
+        if (event.event === "tender") {
+          scraped.push(event.result);
+          setResults({ results: [...scraped] });
+          setScrapedData({ results: [...scraped] });
+        } else if (event.event === "progress") {
+          setProgress(event);
+        } else if (event.event === "error") {
+          throw new Error(event.detail);
+        }
+      });
+      const titles = scraped.map(r => r.Title);
       const { data : cls } = await authAxios.post("/classify", {
         tenders: titles,
         keywords: keywords.split(',').map(k => k.trim())
@@ -50,7 +90,8 @@ export default function Generate(){
         setError("Unauthorized. Please log in again.");
         localStorage.removeItem("accessToken"); // optional: clear token
       } 
-      if (err.name === 'CanceledError') {
+      // fetch rejects with AbortError when stopped, axios with CanceledError
+      else if (err.name === 'AbortError' || err.name === 'CanceledError') {
         setError("Scraping cancelled by user.");
       }
       else {
@@ -298,7 +339,12 @@ export default function Generate(){
               <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-500 mr-4"></div>
               <div>
                 <p className="font-medium">Scraping Gebiz</p>
-                <p className="text-sm text-gray-600">Searching for tenders...</p>
+                <p className="text-sm text-gray-600">
+                  {progress
+                    ? `${progress.keyword} · ${progress.tab} tab${progress.page ? ` · page ${progress.page}` : ""}`
+                    : "Searching for tenders..."}
+                </p>
+                <p className="text-sm text-gray-600">{results?.results.length || 0} tenders found so far</p>
                 <button className="mt-4 p-2 bg-red-600 hover:bg-red-700 text-white font-semibold py-2 rounded-lg" onClick={handleStop}>
                   Stop Scrape
                 </button>
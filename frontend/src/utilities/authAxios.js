@@ -4,12 +4,14 @@ const authAxios = axios.create({
   baseURL: "http://localhost:8000",
 });
 
+// the Authorization header for the current access token, for requests that can't go through axios (e.g. streamed fetches)
+export function authHeader() {
+  const access_token = localStorage.getItem("accessToken");
+  return access_token ? { Authorization: `Bearer ${access_token}` } : {};
+}
+
 authAxios.interceptors.request.use(config => {
-    const access_token = localStorage.getItem("accessToken");
-    console.log();
-    if (access_token) {
-      config.headers.Authorization = `Bearer ${access_token}`;
-    }
+    Object.assign(config.headers, authHeader());
     return config;
   });
   